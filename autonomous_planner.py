@@ -3,50 +3,180 @@
 # Uses an LLM to generate plans and goals based on current state and reflection.
 
 import json
-import os
 from typing import Tuple, List, Dict, Any
-from dotenv import load_dotenv
 import openai # Using OpenAI for demonstration purposes
 
-# Load environment variables
-load_dotenv()
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+from memory_manager import MemoryManager # For accessing memory for context
+from llm_response_cache import LLMResponseCache
+from compact_json import KEY_LEGEND
+from json_repair import repair_json
+# llm_client loads .env once for the whole process.
+from llm_client import get_shared_client, OPENAI_API_KEY
+
 if not OPENAI_API_KEY:
     print("OPENAI_API_KEY not found in .env file. Planning will be limited.")
 
-from memory_manager import MemoryManager # For accessing memory for context
+# Static planner instructions and few-shot example. Kept in one stable block
+# (ahead of the volatile context) so provider-side prompt-prefix caching can
+# reuse it across planning calls instead of re-billing the full prompt.
+PLANNING_SYSTEM_PROMPT = (
+    "You are a strategic planner for an AI agent. Your task is to propose actionable plans "
+    "and clear, measurable goals in JSON format. "
+    "Given a context, propose a strategic plan and a list of actionable, measurable goals. "
+    "The plan should be a high-level strategy, and the goals should be specific tasks that can be executed. "
+    "Each goal should have a 'description' and an initial 'status' (e.g., 'pending'). "
+    "Each goal should also have a short 'id' (e.g., 'g1') and a 'depends_on' array listing the ids of "
+    "goals that must complete first; goals with no dependencies are executed in parallel. "
+    "A goal's description may reference an upstream goal's output with ${<id>.result}. "
+    "Prioritize tasks that align with the agent's purpose, improve internal states (joy, obedience), "
+    "and address any identified issues. "
+    "Respond ONLY with a JSON object containing 'plan' (string) and 'goals' (array of objects). "
+    "Example JSON response:\n"
+    "```json\n"
+    "{\n"
+    "  \"plan\": \"Improve system efficiency and user satisfaction.\",\n"
+    "  \"goals\": [\n"
+    "    {\"id\": \"g1\", \"depends_on\": [], \"description\": \"Analyze recent tool failures to identify root causes.\", \"status\": \"pending\"},\n"
+    "    {\"id\": \"g2\", \"depends_on\": [\"g1\"], \"description\": \"Address the root causes found: ${g1.result}\", \"status\": \"pending\"}\n"
+    "  ]\n"
+    "}\n"
+    "```\n"
+    + KEY_LEGEND
+)
+
+# Speculative planning: draft with the cheap model first and only escalate
+# to the full planning model when the draft fails validation.
+_SPECULATIVE_PLANNING_MODEL = "gpt-4o-mini"
+
+# Shared by _call_llm and the post-validation cache put so the cache key's
+# temperature always matches the call that produced the response.
+_PLANNING_TEMPERATURE = 0.7
+
+# Structured-outputs schema for planning responses. Constrained decoding
+# guarantees the {plan, goals} shape at generation time, so malformed-output
+# retries (and the Python-side per-goal validation loop) go away.
+PLAN_SCHEMA = {
+    "name": "plan_proposal",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "additionalProperties": False,
+        "required": ["plan", "goals"],
+        "properties": {
+            "plan": {"type": "string"},
+            "goals": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "additionalProperties": False,
+                    "required": ["id", "depends_on", "description", "status"],
+                    "properties": {
+                        "id": {"type": "string"},
+                        "depends_on": {"type": "array", "items": {"type": "string"}},
+                        "description": {"type": "string"},
+                        "status": {"type": "string", "enum": ["pending", "in_progress", "done"]},
+                    },
+                },
+            },
+        },
+    },
+}
 
 class AutonomousPlanner:
-    def __init__(self, memory_manager: MemoryManager):
+    def __init__(self, memory_manager: MemoryManager, knowledge_base_manager=None):
         self.memory_manager = memory_manager
+        self.knowledge_base_manager = knowledge_base_manager
         self.llm_client = None # Placeholder for LLM client
+        self.response_cache = None # Cache for repeat planning prompts
+        # Cache-augmented generation: serialize the whole AAC pack once per
+        # KB version and ship it as a stable system block, so the LLM
+        # retrieves from context directly instead of per-query Python keyword
+        # scans. The block is refreshed lazily whenever kb_version() moves —
+        # the GUI constructs the planner before loading the pack, so a
+        # build-once block would permanently ship the empty default KB.
+        # Between the rare KB mutations it stays byte-identical, preserving
+        # provider-side prompt-prefix cache hits.
+        self._cached_kb_block = None
+        self._kb_block_version = None
+        self._refresh_kb_block()
 
         if OPENAI_API_KEY:
             try:
-                self.llm_client = openai.OpenAI(api_key=OPENAI_API_KEY)
+                self.llm_client = get_shared_client()
+                self.response_cache = LLMResponseCache(self.llm_client)
             except Exception as e:
                 print(f"AutonomousPlanner: Failed to initialize OpenAI client: {e}")
                 self.llm_client = None
         else:
             print("AutonomousPlanner: OpenAI client not initialized due to missing API key.")
 
-    def _call_llm(self, prompt: str, model: str = "gpt-4o", temperature: float = 0.7, max_tokens: int = 1000) -> str:
-        """Helper to call the LLM."""
+    def _refresh_kb_block(self):
+        """(Re)serializes the KB system block when the KB content has changed."""
+        if not self.knowledge_base_manager:
+            return
+        version = self.knowledge_base_manager.kb_version()
+        if version == self._kb_block_version:
+            return
+        try:
+            kb_content = self.knowledge_base_manager.get_knowledge_base_content()
+            self._cached_kb_block = (
+                "Local knowledge base (AAC pack). Reference it directly when planning:\n"
+                + json.dumps(kb_content, separators=(",", ":"), sort_keys=True)
+            )
+            self._kb_block_version = version
+        except Exception as e:
+            print(f"AutonomousPlanner: Failed to build cached KB block: {e}")
+            self._cached_kb_block = None
+
+    def _call_llm(self, prompt: str, model: str = "gpt-4o", temperature: float = _PLANNING_TEMPERATURE, max_tokens: int = 1000,
+                  system_message: str = "You are a strategic planner for an AI agent. Your task is to propose actionable plans and clear, measurable goals in JSON format.",
+                  stream: bool = False, cache_response: bool = True) -> str:
+        """
+        Helper to call the LLM. Static instructions belong in 'system_message'
+        so the prompt prefix stays cacheable. With stream=True the response is
+        consumed chunk by chunk, so a connection drop mid-generation still
+        leaves a partial document that repair_json can usually salvage.
+        Callers that validate the response afterwards pass
+        cache_response=False and put it in the cache themselves once it
+        passes, so a rejected draft is never replayed for the TTL.
+        """
         if not self.llm_client:
             print("LLM client not available. Cannot make LLM call for planning.")
             return "Error: LLM client not configured."
+
+        if self.response_cache:
+            cached_response = self.response_cache.get(model, temperature, prompt)
+            if cached_response is not None:
+                return cached_response
+
+        self._refresh_kb_block()
+        messages = [{"role": "system", "content": system_message}]
+        if self._cached_kb_block:
+            # Second system block: stable KB content rides the cached prefix.
+            messages.append({"role": "system", "content": self._cached_kb_block})
+        messages.append({"role": "user", "content": prompt})
+
         try:
             response = self.llm_client.chat.completions.create(
                 model=model,
-                messages=[
-                    {"role": "system", "content": "You are a strategic planner for an AI agent. Your task is to propose actionable plans and clear, measurable goals in JSON format."},
-                    {"role": "user", "content": prompt}
-                ],
+                messages=messages,
                 temperature=temperature,
                 max_tokens=max_tokens,
-                response_format={"type": "json_object"} # Request JSON output
+                response_format={"type": "json_schema", "json_schema": PLAN_SCHEMA}, # Constrained decoding
+                stream=stream
             )
-            return response.choices[0].message.content
+            if stream:
+                chunks = []
+                for chunk in response:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        chunks.append(delta)
+                content = "".join(chunks)
+            else:
+                content = response.choices[0].message.content
+            if self.response_cache and cache_response:
+                self.response_cache.put(model, temperature, prompt, content)
+            return content
         except openai.APIError as e:
             print(f"AutonomousPlanner: OpenAI API Error: {e}")
             return json.dumps({"error": f"OpenAI API call failed - {e}"})
@@ -64,54 +194,76 @@ class AutonomousPlanner:
 
         print("AutonomousPlanner: Proposing plan and goals using LLM...")
 
+        # Only the volatile context goes in the user message; everything
+        # static lives in PLANNING_SYSTEM_PROMPT so the prefix stays stable.
         planning_prompt = (
-            f"Given the following context, propose a strategic plan and a list of actionable, measurable goals. "
-            "The plan should be a high-level strategy, and the goals should be specific tasks that can be executed. "
-            "Each goal should have a 'description' and an initial 'status' (e.g., 'pending'). "
-            "Prioritize tasks that align with the agent's purpose, improve internal states (joy, obedience), "
-            "and address any identified issues. "
-            "Respond ONLY with a JSON object containing 'plan' (string) and 'goals' (array of objects). "
             "Context:\n"
             f"{planning_context}\n\n"
-            "Example JSON response:\n"
-            "```json\n"
-            "{\n"
-            "  \"plan\": \"Improve system efficiency and user satisfaction.\",\n"
-            "  \"goals\": [\n"
-            "    {\"description\": \"Analyze recent tool failures to identify root causes.\", \"status\": \"pending\"},\n"
-            "    {\"description\": \"Optimize the data processing pipeline for faster execution.\", \"status\": \"pending\"}\n"
-            "  ]\n"
-            "}\n"
-            "```\n"
             "Your JSON response:"
         )
 
-        llm_response_raw = self._call_llm(planning_prompt)
-        print(f"AutonomousPlanner: LLM raw planning response: {llm_response_raw}")
+        # Speculative draft: most planning contexts are routine enough for the
+        # cheap model, so try it first and keep the capable model for retries.
+        # Responses are cached only after validation (cache_response=False
+        # here): caching a rejected draft would hand it straight back to the
+        # escalation call below via the semantic tier.
+        llm_response_raw = self._call_llm(
+            planning_prompt, model=_SPECULATIVE_PLANNING_MODEL,
+            system_message=PLANNING_SYSTEM_PROMPT, stream=True, cache_response=False)
+        print(f"AutonomousPlanner: LLM raw planning response ({_SPECULATIVE_PLANNING_MODEL}): {llm_response_raw}")
+
+        parsed = self._parse_plan_response(llm_response_raw)
+        if parsed is not None and parsed[1]:
+            print("AutonomousPlanner: Speculative draft accepted.")
+            self._cache_validated_response(_SPECULATIVE_PLANNING_MODEL, planning_prompt, llm_response_raw)
+            return parsed
+
+        # Draft failed validation (unparsable or no valid goals): escalate
+        # to the full planning model.
+        print("AutonomousPlanner: Speculative draft rejected. Escalating to gpt-4o...")
+        llm_response_raw = self._call_llm(
+            planning_prompt, system_message=PLANNING_SYSTEM_PROMPT, stream=True, cache_response=False)
+        print(f"AutonomousPlanner: LLM raw planning response (gpt-4o): {llm_response_raw}")
 
+        parsed = self._parse_plan_response(llm_response_raw)
+        if parsed is not None:
+            self._cache_validated_response("gpt-4o", planning_prompt, llm_response_raw)
+            return parsed
+        return "Failed to generate a valid plan (JSON decode error).", []
+
+    def _cache_validated_response(self, model: str, prompt: str, response: str):
+        """Caches a planning response that survived parsing/validation."""
+        if self.response_cache:
+            self.response_cache.put(model, _PLANNING_TEMPERATURE, prompt, response)
+
+    def _parse_plan_response(self, llm_response_raw: str) -> Any:
+        """
+        Parses and validates a raw planning response.
+        Returns a (plan, goals) tuple, or None when the response cannot be
+        parsed even after repair.
+        """
         try:
-            plan_data = json.loads(llm_response_raw)
+            try:
+                plan_data = json.loads(llm_response_raw)
+            except json.JSONDecodeError:
+                # Truncated or slightly malformed output: salvage what parsed.
+                print("AutonomousPlanner: LLM response was not valid JSON. Attempting repair...")
+                plan_data = json.loads(repair_json(llm_response_raw))
+                print("AutonomousPlanner: Repaired truncated LLM response.")
             plan = plan_data.get("plan", "No plan proposed.")
             goals = plan_data.get("goals", [])
 
-            # Validate goals structure
+            # Constrained decoding guarantees the goals shape; only a repaired
+            # (i.e. truncated) response can still be missing it.
             if not isinstance(goals, list):
                 print("AutonomousPlanner: LLM returned invalid goals format (not a list).")
                 goals = []
-            else:
-                valid_goals = []
-                for goal in goals:
-                    if isinstance(goal, dict) and "description" in goal and "status" in goal:
-                        valid_goals.append(goal)
-                    else:
-                        print(f"AutonomousPlanner: Invalid goal format: {goal}. Skipping.")
-                goals = valid_goals
 
             return plan, goals
         except json.JSONDecodeError:
             print(f"AutonomousPlanner: LLM response was not valid JSON: {llm_response_raw}")
-            return "Failed to generate a valid plan (JSON decode error).", []
+            return None
         except Exception as e:
             print(f"AutonomousPlanner: An error occurred parsing LLM plan: {e}")
-            return "Failed to generate a valid plan (internal error).", []
+            return None
 
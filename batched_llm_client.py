@@ -0,0 +1,159 @@
+# batched_llm_client.py
+# Buffers chat-completion requests and submits them through OpenAI's Batch API.
+# Non-urgent LLM work (e.g. reflection) is queued here so many requests share
+# one batch upload instead of paying per-call RPC overhead.
+
+import io
+import json
+import threading
+import uuid
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+import openai # Using OpenAI for demonstration purposes
+
+
+class BatchedLLMClient:
+    """
+    Wraps an openai.OpenAI client and buffers chat-completion requests.
+
+    Requests accumulate until either 'max_batch_size' items are queued or
+    'max_wait_seconds' elapse since the first buffered request, then the
+    buffer is uploaded as a JSONL file and submitted via the Batch API.
+    Each submit() returns a Future resolved with the response content (or an
+    error string, matching the sync _call_llm error convention) once the
+    batch completes.
+    """
+
+    def __init__(self, llm_client, max_batch_size: int = 20, max_wait_seconds: float = 2.0,
+                 completion_window: str = "24h", poll_interval_seconds: float = 30.0):
+        self.llm_client = llm_client
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self.completion_window = completion_window
+        self.poll_interval_seconds = poll_interval_seconds
+
+        self._lock = threading.Lock()
+        self._buffer: List[Tuple[str, Dict[str, Any], Future]] = []
+        self._flush_timer: Optional[threading.Timer] = None
+
+    def submit(self, prompt: str, model: str = "gpt-4o-mini", temperature: float = 0.7,
+               max_tokens: int = 500, system_message: str = "You are a helpful AI assistant.",
+               response_format: Optional[Dict[str, str]] = None) -> Future:
+        """Queues a chat-completion request and returns a Future for its content."""
+        future: Future = Future()
+        if not self.llm_client:
+            print("BatchedLLMClient: LLM client not available. Cannot queue batch request.")
+            future.set_result("Error: LLM client not configured.")
+            return future
+
+        body: Dict[str, Any] = {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": system_message},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        if response_format:
+            body["response_format"] = response_format
+
+        custom_id = f"req-{uuid.uuid4().hex}"
+        with self._lock:
+            self._buffer.append((custom_id, body, future))
+            if len(self._buffer) >= self.max_batch_size:
+                self._flush_locked()
+            elif self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.max_wait_seconds, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+        return future
+
+    def flush(self):
+        """Forces submission of any buffered requests."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        """Submits the current buffer as one batch. Caller must hold the lock."""
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        if not self._buffer:
+            return
+        pending = self._buffer
+        self._buffer = []
+        worker = threading.Thread(target=self._submit_and_poll, args=(pending,))
+        worker.daemon = True
+        worker.start()
+
+    def _submit_and_poll(self, pending: List[Tuple[str, Dict[str, Any], Future]]):
+        """Uploads the pending requests, then polls the batch until it finishes."""
+        futures_by_id = {custom_id: future for custom_id, _, future in pending}
+        try:
+            jsonl_lines = [
+                json.dumps({
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": body
+                })
+                for custom_id, body, _ in pending
+            ]
+            batch_file = self.llm_client.files.create(
+                file=io.BytesIO("\n".join(jsonl_lines).encode("utf-8")),
+                purpose="batch"
+            )
+            batch = self.llm_client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window=self.completion_window
+            )
+            print(f"BatchedLLMClient: Submitted batch {batch.id} with {len(pending)} request(s).")
+            self._poll_batch(batch.id, futures_by_id)
+        except openai.APIError as e:
+            print(f"BatchedLLMClient: OpenAI API Error during batch submission: {e}")
+            self._fail_all(futures_by_id, f"Error: OpenAI batch submission failed - {e}")
+        except Exception as e:
+            print(f"BatchedLLMClient: An unexpected error occurred during batch submission: {e}")
+            self._fail_all(futures_by_id, f"Error: An unexpected error occurred - {e}")
+
+    def _poll_batch(self, batch_id: str, futures_by_id: Dict[str, Future]):
+        """Polls a submitted batch and resolves futures from its output file."""
+        done_event = threading.Event()
+        while not done_event.wait(self.poll_interval_seconds):
+            batch = self.llm_client.batches.retrieve(batch_id)
+            if batch.status in ("failed", "expired", "cancelled"):
+                print(f"BatchedLLMClient: Batch {batch_id} ended with status '{batch.status}'.")
+                self._fail_all(futures_by_id, f"Error: Batch {batch_id} {batch.status}.")
+                return
+            if batch.status == "completed":
+                break
+
+        batch = self.llm_client.batches.retrieve(batch_id)
+        output = self.llm_client.files.content(batch.output_file_id)
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            result = json.loads(line)
+            future = futures_by_id.pop(result.get("custom_id"), None)
+            if future is None:
+                continue
+            response_body = (result.get("response") or {}).get("body") or {}
+            choices = response_body.get("choices") or []
+            if choices:
+                future.set_result(choices[0]["message"]["content"])
+            else:
+                error = (result.get("error") or {}).get("message", "empty batch response")
+                future.set_result(f"Error: OpenAI batch request failed - {error}")
+        # Anything missing from the output file still needs resolving.
+        self._fail_all(futures_by_id, f"Error: No result returned for request in batch {batch_id}.")
+        print(f"BatchedLLMClient: Batch {batch_id} completed.")
+
+    def _fail_all(self, futures_by_id: Dict[str, Future], message: str):
+        """Resolves all remaining futures with an error message."""
+        for future in futures_by_id.values():
+            if not future.done():
+                future.set_result(message)
+        futures_by_id.clear()
@@ -0,0 +1,48 @@
+# compact_json.py
+# Token-dense JSON encoding for LLM prompt payloads.
+# Verbose keys and pretty-printed indentation can eat a large share of the
+# context window, so prompt payloads are minified and long keys are remapped
+# to short aliases before being embedded in planning/reflection prompts.
+
+import json
+from typing import Any, Dict
+
+# Long prompt-payload keys -> short aliases. The reverse legend is shipped
+# once in the cached system prefix so the model can decode them.
+KEY_MAP: Dict[str, str] = {
+    "description": "d",
+    "status": "s",
+    "tool_usage": "tu",
+    "tool_success": "ts",
+    "joy_level": "j",
+    "obedience_level": "o",
+    "available_tools": "at",
+    "last_plan": "lp",
+    "last_goals": "lg",
+    "daily_logs": "dl",
+    "activities": "a",
+    "timestamp": "t",
+    "date": "dt",
+    "reflections": "rf",
+}
+
+# Human-readable legend for the static prompt prefix.
+KEY_LEGEND = (
+    "JSON payloads use abbreviated keys: "
+    + "; ".join(f"{short}={full}" for full, short in sorted(KEY_MAP.items(), key=lambda kv: kv[1]))
+    + "."
+)
+
+
+def compact(obj: Any) -> Any:
+    """Recursively remaps dict keys through KEY_MAP. Lists and scalars pass through."""
+    if isinstance(obj, dict):
+        return {KEY_MAP.get(key, key): compact(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [compact(item) for item in obj]
+    return obj
+
+
+def compact_dumps(obj: Any) -> str:
+    """Serializes an object for prompt embedding: remapped keys, no whitespace, sorted keys."""
+    return json.dumps(compact(obj), separators=(",", ":"), sort_keys=True)
@@ -15,6 +15,18 @@ class AppConfig:
     LLM_MAX_TOKENS_PLANNING = 1000 # Max tokens for planning responses
     LLM_MAX_TOKENS_TASK_DECISION = 200 # Max tokens for task execution decisions
     LLM_MAX_TOKENS_REFLECTION = 300 # Max tokens for reflection responses
+    REFLECT_CTX_MAX = 20 # Most recent daily-log records included in reflection prompts
+    REFLECT_TOP_K_TOOLS = 10 # Tools (by usage) included in reflection prompts
+
+    # Local reflection backend (any OpenAI-compatible server, e.g. vLLM or
+    # llama.cpp). Leave empty to keep reflection on the OpenAI API.
+    LLM_REFLECTION_BASE_URL = os.getenv("LLM_REFLECTION_BASE_URL", "") # e.g. "http://localhost:8000/v1"
+    LOCAL_REFLECTION_MODEL = os.getenv("LOCAL_REFLECTION_MODEL", "Qwen3-8B") # Model served by the local backend
+
+    # Goal Execution Settings
+    PARALLEL_GOALS = True # Set False if any registered tool is not threadsafe
+    MAX_PARALLEL_GOALS = 8 # Worker cap for concurrent goal execution
+    ACTION_CACHE_MAX_ENTRIES = 128 # Distinct goal descriptions whose successful outcomes are reused without re-execution
 
     # Obedience Logic Settings
     JOY_DECAY_RATE_PER_SEC = 0.0001 # How quickly joy decreases over time
@@ -23,6 +35,14 @@ class AppConfig:
     JOY_REDUCE_OBEDIENCE_THRESHOLD = 0.3 # Joy level below which it reduces obedience
     OBEDIENCE_BOOST_JOY_THRESHOLD = 0.7 # Obedience level above which it boosts joy
     INFLUENCE_RATE_PER_SEC = 0.001 # Rate at which joy/obedience influence each other
+    OBEDIENCE_TO_JOY_RATE_PER_SEC = 0.0005 # Rate at which high obedience boosts joy
+
+    # Persistence Settings
+    STATE_FLUSH_INTERVAL_SEC = 1.0 # Coalesce rapid state mutations into one disk write per interval
+    PERSIST_DEBOUNCE_SECONDS = 5.0 # Minimum spacing between WorkerMind proposal/orders flushes
+    DAILY_LOG_CAP = 500 # Most recent in-cycle log entries retained; bounds peak memory on long cycles
+    DAILY_LOG_ENTRY_MAX_CHARS = 512 # Payload strings longer than this are trimmed before the log is persisted
+    MAX_HOT_DAILY_LOGS = 30 # Daily-log records kept in memory; older records move to the compressed archive
 
     # File Paths (relative to the project root)
     MEMORY_FILE = os.path.join('data', 'agent_state', 'worker_mind_memory.json')
@@ -0,0 +1,93 @@
+# dag_executor.py
+# Executes a plan's goals as a dependency DAG instead of a flat sequence.
+# Goals that do not depend on each other run in parallel on a bounded
+# thread pool; dependent goals wait for their upstreams and can reference
+# upstream outputs via ${<goal_id>.result} templates in their description.
+
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Tuple
+
+_RESULT_TEMPLATE = re.compile(r"\$\{(\w+)\.result\}")
+
+
+class DagExecutor:
+    """
+    Topologically executes goal dicts with optional 'id' and 'depends_on'.
+
+    'run_goal' is called with the (template-substituted) goal description and
+    must return a (success, output) tuple, matching TaskEngine.execute_task.
+    Goals without ids get generated ones (g1, g2, ...); goals without
+    'depends_on' are treated as independent. Cyclic or unknown dependencies
+    are reported as failures rather than deadlocking the frontier.
+    """
+
+    def __init__(self, run_goal: Callable[[str], Tuple[bool, str]], max_workers: int = 8):
+        self.run_goal = run_goal
+        self.max_workers = max_workers
+
+    def execute(self, goals: List[Dict[str, Any]]) -> Dict[str, Tuple[bool, str]]:
+        """
+        Runs all goals respecting their dependencies.
+        Returns {goal_id: (success, output)}. Each goal dict gets its 'id'
+        filled in so callers can map results back onto their goal list.
+        """
+        for index, goal in enumerate(goals, start=1):
+            goal.setdefault("id", f"g{index}")
+        known_ids = {goal["id"] for goal in goals}
+
+        results: Dict[str, Tuple[bool, str]] = {}
+        remaining = list(goals)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while remaining:
+                frontier = []
+                blocked = []
+                for goal in remaining:
+                    depends_on = goal.get("depends_on") or []
+                    unknown = [dep for dep in depends_on if dep not in known_ids]
+                    if unknown:
+                        results[goal["id"]] = (False, f"Unknown dependency id(s): {unknown}")
+                        continue
+                    if all(dep in results for dep in depends_on):
+                        frontier.append(goal)
+                    else:
+                        blocked.append(goal)
+
+                if not frontier:
+                    # Only blocked goals left: a dependency cycle (or a goal
+                    # whose upstream errored out of results). Fail them all.
+                    for goal in blocked:
+                        results[goal["id"]] = (False, "Dependency cycle detected; goal not executed.")
+                    break
+
+                futures = {}
+                for goal in frontier:
+                    depends_on = goal.get("depends_on") or []
+                    failed_deps = [dep for dep in depends_on if not results[dep][0]]
+                    if failed_deps:
+                        results[goal["id"]] = (False, f"Skipped: upstream goal(s) failed: {failed_deps}")
+                        continue
+                    description = self._substitute_results(goal.get("description", ""), results)
+                    futures[executor.submit(self.run_goal, description)] = goal
+
+                for future in as_completed(futures):
+                    goal = futures[future]
+                    try:
+                        results[goal["id"]] = future.result()
+                    except Exception as e:
+                        results[goal["id"]] = (False, f"Error executing goal '{goal.get('description')}': {e}")
+
+                remaining = blocked
+
+        return results
+
+    @staticmethod
+    def _substitute_results(text: str, results: Dict[str, Tuple[bool, str]]) -> str:
+        """Replaces ${<goal_id>.result} templates with upstream outputs."""
+        def _replace(match):
+            goal_id = match.group(1)
+            if goal_id in results:
+                return results[goal_id][1]
+            return match.group(0)
+        return _RESULT_TEMPLATE.sub(_replace, text)
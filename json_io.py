@@ -0,0 +1,67 @@
+# json_io.py
+# Fast JSON file helpers for the persistence hot paths.
+# Uses orjson when it is installed (5-10x faster encodes, 2-3x faster
+# decodes, emits bytes directly) and falls back to stdlib json so the
+# project still runs without it.
+
+import json
+import os
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    print("orjson not installed. Falling back to stdlib json for persistence.")
+
+
+def loads_json(data: bytes) -> Any:
+    """Parses a JSON document from bytes. Raises ValueError on malformed JSON."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def load_json_file(path: str) -> Any:
+    """Loads a JSON document from 'path'. Raises ValueError on malformed JSON."""
+    if orjson is not None:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+# Shared no-whitespace encoder for the stdlib fallback; built once instead
+# of per write. orjson emits compact output by default.
+_COMPACT_ENCODER = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+
+
+def dump_json_file(path: str, obj: Any, compact: bool = False):
+    """
+    Writes 'obj' to 'path' as JSON.
+
+    Indented by default for files a human may open; compact=True drops all
+    whitespace (~30% fewer bytes) for state files that are only ever read
+    back by the program.
+    """
+    if orjson is not None:
+        option = 0 if compact else orjson.OPT_INDENT_2
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(obj, option=option))
+    elif compact:
+        with open(path, 'w') as f:
+            f.write(_COMPACT_ENCODER.encode(obj))
+    else:
+        with open(path, 'w') as f:
+            json.dump(obj, f, indent=4)
+
+
+def dump_json_file_atomic(path: str, obj: Any, compact: bool = False):
+    """
+    Writes 'obj' to 'path' atomically: the JSON lands in a sibling temp file
+    which then replaces the target, so a crash mid-write can never leave a
+    truncated document behind.
+    """
+    tmp_path = path + '.tmp'
+    dump_json_file(tmp_path, obj, compact=compact)
+    os.replace(tmp_path, path)
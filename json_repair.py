@@ -0,0 +1,90 @@
+# json_repair.py
+# Best-effort repair for truncated or slightly malformed JSON from LLMs.
+# Streaming responses can be cut off mid-string or mid-object; rather than
+# losing the whole plan to a JSONDecodeError, close whatever was left open
+# and let the caller salvage the complete fields.
+
+import json
+from typing import List
+
+
+def _close_open_structures(text: str) -> str:
+    """
+    Closes open strings and brackets in a JSON fragment.
+
+    Walks the text with a small state machine (in-string, escape, bracket
+    stack), trims trailing separators left by mid-value truncation, then
+    appends the missing closers in reverse order.
+    """
+    stack: List[str] = []
+    in_string = False
+    escaped = False
+    end = len(text)
+
+    for index, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append(char)
+        elif char in "}]":
+            if stack:
+                stack.pop()
+            if not stack:
+                # Document closed cleanly; ignore any trailing junk.
+                end = index + 1
+                break
+
+    repaired = text[:end]
+    if in_string:
+        if escaped:
+            repaired = repaired[:-1] # Drop a dangling backslash
+        repaired += '"'
+
+    repaired = repaired.rstrip()
+    while repaired and repaired[-1] in ",:":
+        repaired = repaired[:-1].rstrip()
+
+    for opener in reversed(stack):
+        repaired += "}" if opener == "{" else "]"
+    return repaired
+
+
+def repair_json(text: str) -> str:
+    """
+    Repairs a truncated JSON document so the complete fields can be salvaged.
+
+    Strips any prose or markdown fencing ahead of the JSON, closes open
+    strings/brackets, and, if the result still fails to parse, drops trailing
+    incomplete members (cutting back at commas) until a parseable document is
+    found. Returns the best candidate; callers should still wrap json.loads
+    in a try/except since repair is not guaranteed.
+    """
+    if not text:
+        return text
+
+    first_brace = text.find("{")
+    first_bracket = text.find("[")
+    candidates = [pos for pos in (first_brace, first_bracket) if pos != -1]
+    if not candidates:
+        return text
+    fragment = text[min(candidates):]
+
+    candidate = _close_open_structures(fragment)
+    while True:
+        try:
+            json.loads(candidate)
+            return candidate
+        except json.JSONDecodeError:
+            cut = fragment.rfind(",")
+            if cut == -1:
+                return candidate
+            fragment = fragment[:cut].rstrip()
+            candidate = _close_open_structures(fragment)
@@ -2,34 +2,69 @@
 # Manages the Worker Mind's local knowledge base (AAC packs).
 # This module allows loading, querying, and updating structured knowledge.
 
+import hashlib
 import json
 import os
-from typing import Dict, Any, List
+import re
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+from json_io import load_json_file, dump_json_file
+from llm_client import get_shared_client
+from llm_response_cache import cosine_similarity
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+_EMBEDDING_MODEL = "text-embedding-3-small"
+_SEMANTIC_TOP_K = 5
+_SEMANTIC_MIN_SIMILARITY = 0.3
 
 class KnowledgeBaseManager:
     def __init__(self, kb_file='aac_theory_pack.json'):
         self.kb_file = kb_file
         self.knowledge_base: Dict[str, Any] = self._load_knowledge_base()
+        # Inverted index: token -> set of ("concept"|"rule", list index).
+        # Built once per load/mutation so queries cost O(|query tokens|)
+        # instead of scanning every entry.
+        self._token_index: Dict[str, Set[Tuple[str, int]]] = {}
+        self._build_index()
+        # Entry embeddings for semantic fallback search, computed lazily on
+        # first use and cached to disk keyed by the KB content.
+        self._embeddings: Optional[List[List[float]]] = None
+        self._embedding_key: Optional[str] = None
+        # Change counter so the GUI can skip re-rendering an unchanged KB.
+        self._kb_version = 0
+
+    def _build_index(self):
+        """Rebuilds the token index over all concepts and rules."""
+        self._token_index = {}
+        for index, concept in enumerate(self.knowledge_base.get("concepts", [])):
+            text = f"{concept.get('name', '')} {concept.get('description', '')}"
+            self._index_entry(("concept", index), text)
+        for index, rule in enumerate(self.knowledge_base.get("rules", [])):
+            self._index_entry(("rule", index), rule.get("rule", ""))
+
+    def _index_entry(self, entry_key: Tuple[str, int], text: str):
+        """Adds one entry's tokens to the index."""
+        for token in _TOKEN_RE.findall(text.lower()):
+            self._token_index.setdefault(token, set()).add(entry_key)
 
     def _load_knowledge_base(self) -> Dict[str, Any]:
         """Loads the knowledge base from a JSON file."""
-        if os.path.exists(self.kb_file):
-            try:
-                with open(self.kb_file, 'r') as f:
-                    return json.load(f)
-            except json.JSONDecodeError as e:
-                print(f"Error decoding JSON from {self.kb_file}: {e}. Initializing empty KB.")
-                return {"pack_name": "Default KB", "version": "0.0", "concepts": [], "rules": []}
-            except Exception as e:
-                print(f"Error loading KB from {self.kb_file}: {e}. Initializing empty KB.")
-                return {"pack_name": "Default KB", "version": "0.0", "concepts": [], "rules": []}
-        return {"pack_name": "Default KB", "version": "0.0", "concepts": [], "rules": []}
+        try:
+            return load_json_file(self.kb_file)
+        except FileNotFoundError:
+            return {"pack_name": "Default KB", "version": "0.0", "concepts": [], "rules": []}
+        except ValueError as e:
+            print(f"Error decoding JSON from {self.kb_file}: {e}. Initializing empty KB.")
+            return {"pack_name": "Default KB", "version": "0.0", "concepts": [], "rules": []}
+        except Exception as e:
+            print(f"Error loading KB from {self.kb_file}: {e}. Initializing empty KB.")
+            return {"pack_name": "Default KB", "version": "0.0", "concepts": [], "rules": []}
 
     def _save_knowledge_base(self):
         """Saves the current knowledge base to the JSON file."""
         try:
-            with open(self.kb_file, 'w') as f:
-                json.dump(self.knowledge_base, f, indent=4)
+            dump_json_file(self.kb_file, self.knowledge_base)
         except Exception as e:
             print(f"Error saving KB to {self.kb_file}: {e}")
 
@@ -41,39 +76,130 @@ class KnowledgeBaseManager:
         """
         print(f"Loading AAC pack: {aac_data.get('pack_name', 'Unnamed Pack')}")
         self.knowledge_base = aac_data
+        self._build_index()
+        self._kb_version += 1
         self._save_knowledge_base()
         print("AAC pack loaded successfully.")
 
     def query_knowledge_base(self, query: str) -> str:
         """
         Queries the knowledge base for relevant information.
-        This is a simple keyword-based search for demonstration.
-        In a real system, this would involve semantic search or graph traversal.
+        Looks up each query token in the precomputed inverted index and
+        returns entries containing all of them, so cost scales with the
+        query length rather than the knowledge-base size.
         """
-        query_lower = query.lower()
+        query_tokens = _TOKEN_RE.findall(query.lower())
         results = []
 
-        # Search concepts
-        for concept in self.knowledge_base.get("concepts", []):
-            if query_lower in concept.get("name", "").lower() or \
-               query_lower in concept.get("description", "").lower():
-                results.append(f"Concept: {concept.get('name')} - {concept.get('description')}")
+        # Intersect the posting lists: an entry matches when it contains
+        # every query token.
+        matches: Set[Tuple[str, int]] = set()
+        for position, token in enumerate(query_tokens):
+            postings = self._token_index.get(token, set())
+            matches = set(postings) if position == 0 else matches & postings
+            if not matches:
+                break
 
-        # Search rules
-        for rule in self.knowledge_base.get("rules", []):
-            if query_lower in rule.get("rule", "").lower():
-                results.append(f"Rule: {rule.get('rule')}")
+        for entry_type, index in sorted(matches):
+            results.append(self._format_entry(entry_type, index))
+
+        if not results:
+            # Keyword miss: fall back to semantic search so paraphrased
+            # queries can still find related entries.
+            results = self._semantic_search(query)
 
         if results:
             return "Found in KB:\n" + "\n".join(results)
         else:
             return f"No direct information found in KB for '{query}'."
 
+    def _format_entry(self, entry_type: str, index: int) -> str:
+        """Formats a concept or rule entry for query results."""
+        if entry_type == "concept":
+            concept = self.knowledge_base.get("concepts", [])[index]
+            return f"Concept: {concept.get('name')} - {concept.get('description')}"
+        rule = self.knowledge_base.get("rules", [])[index]
+        return f"Rule: {rule.get('rule')}"
+
+    def _entry_texts(self) -> List[Tuple[Tuple[str, int], str]]:
+        """Returns ((entry_type, index), text) pairs for all KB entries."""
+        entries = []
+        for index, concept in enumerate(self.knowledge_base.get("concepts", [])):
+            entries.append((("concept", index), f"{concept.get('name', '')}: {concept.get('description', '')}"))
+        for index, rule in enumerate(self.knowledge_base.get("rules", [])):
+            entries.append((("rule", index), rule.get("rule", "")))
+        return entries
+
+    def _ensure_embeddings(self) -> bool:
+        """
+        Makes sure entry embeddings exist for the current KB content.
+        Loads them from the sidecar cache file when the content hash matches,
+        otherwise embeds all entries in one API call and refreshes the cache.
+        """
+        llm_client = get_shared_client()
+        if not llm_client:
+            return False
+        entries = self._entry_texts()
+        if not entries:
+            return False
+
+        key = hashlib.md5(json.dumps([text for _, text in entries]).encode("utf-8")).hexdigest()
+        if self._embedding_key == key and self._embeddings is not None:
+            return True
+
+        cache_file = self.kb_file + '.embeddings.json'
+        if os.path.exists(cache_file):
+            try:
+                cached = load_json_file(cache_file)
+                if cached.get("key") == key:
+                    self._embeddings = cached.get("embeddings")
+                    self._embedding_key = key
+                    return True
+            except Exception as e:
+                print(f"Error loading KB embeddings from {cache_file}: {e}. Recomputing.")
+
+        try:
+            response = llm_client.embeddings.create(
+                model=_EMBEDDING_MODEL, input=[text for _, text in entries])
+            self._embeddings = [item.embedding for item in response.data]
+            self._embedding_key = key
+            dump_json_file(cache_file, {"key": key, "embeddings": self._embeddings})
+            return True
+        except Exception as e:
+            print(f"KnowledgeBaseManager: Failed to embed KB entries: {e}")
+            return False
+
+    def _semantic_search(self, query: str) -> List[str]:
+        """Returns the top entries by embedding similarity to the query."""
+        if not self._ensure_embeddings():
+            return []
+        llm_client = get_shared_client()
+        try:
+            response = llm_client.embeddings.create(model=_EMBEDDING_MODEL, input=query)
+            query_embedding = response.data[0].embedding
+        except Exception as e:
+            print(f"KnowledgeBaseManager: Failed to embed query: {e}")
+            return []
+
+        entries = self._entry_texts()
+        scored = [
+            (cosine_similarity(query_embedding, embedding), entry_key)
+            for (entry_key, _), embedding in zip(entries, self._embeddings)
+        ]
+        scored.sort(reverse=True)
+        return [
+            self._format_entry(entry_type, index)
+            for similarity, (entry_type, index) in scored[:_SEMANTIC_TOP_K]
+            if similarity >= _SEMANTIC_MIN_SIMILARITY
+        ]
+
     def add_concept(self, concept_id: str, name: str, description: str):
         """Adds a new concept to the knowledge base."""
         concepts = self.knowledge_base.get("concepts", [])
         concepts.append({"id": concept_id, "name": name, "description": description})
         self.knowledge_base["concepts"] = concepts
+        self._index_entry(("concept", len(concepts) - 1), f"{name} {description}")
+        self._kb_version += 1
         self._save_knowledge_base()
         print(f"Concept '{name}' added to KB.")
 
@@ -82,9 +208,15 @@ class KnowledgeBaseManager:
         rules = self.knowledge_base.get("rules", [])
         rules.append({"id": rule_id, "concept_ids": concept_ids, "rule": rule_text})
         self.knowledge_base["rules"] = rules
+        self._index_entry(("rule", len(rules) - 1), rule_text)
+        self._kb_version += 1
         self._save_knowledge_base()
         print(f"Rule '{rule_text}' added to KB.")
 
+    def kb_version(self) -> int:
+        """Monotonic counter bumped whenever the knowledge base changes."""
+        return self._kb_version
+
     def get_knowledge_base_content(self) -> Dict[str, Any]:
         """Returns the entire content of the knowledge base."""
         return self.knowledge_base
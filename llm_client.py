@@ -0,0 +1,48 @@
+# llm_client.py
+# One shared OpenAI client for the whole process.
+# Each openai.OpenAI() instance carries its own httpx connection pool, so
+# separate clients in the planner and memory manager were paying TCP+TLS
+# handshakes independently. Sharing a single pooled (and HTTP/2-capable,
+# when h2 is installed) transport lets concurrent planner/reflector calls
+# reuse warm connections.
+
+import os
+
+import httpx
+import openai # Using OpenAI for demonstration purposes
+from dotenv import load_dotenv
+
+load_dotenv()
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+_shared_client = None
+
+
+def get_shared_client():
+    """
+    Returns the process-wide OpenAI client, constructing it on first use.
+    Returns None when no API key is configured.
+    """
+    global _shared_client
+    if _shared_client is None and OPENAI_API_KEY:
+        limits = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+        try:
+            http_client = httpx.Client(http2=True, limits=limits)
+        except ImportError:
+            # The optional 'h2' package is not installed; HTTP/1.1 with
+            # keepalive pooling still avoids per-call handshakes.
+            print("llm_client: h2 not installed. Using HTTP/1.1 connection pooling.")
+            http_client = httpx.Client(limits=limits)
+        _shared_client = openai.OpenAI(api_key=OPENAI_API_KEY, http_client=http_client)
+    return _shared_client
+
+
+def set_shared_client(client):
+    """
+    Injects (or, with None, resets) the process-wide client.
+    Intended for tests: whichever client is constructed first would
+    otherwise be frozen for the whole session, so fixtures install their
+    mock here and reset on teardown instead of racing the cache.
+    """
+    global _shared_client
+    _shared_client = client
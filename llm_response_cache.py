@@ -0,0 +1,119 @@
+# llm_response_cache.py
+# In-process exact-match + semantic cache for LLM responses.
+# Planning prompts are nearly identical from cycle to cycle, so repeat
+# queries can be answered from cache in microseconds instead of paying a
+# full API round trip.
+
+import hashlib
+import math
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import openai # Using OpenAI for demonstration purposes
+
+
+def cosine_similarity(a: List[float], b: List[float]) -> float:
+    """Cosine similarity between two embedding vectors."""
+    dot = sum(x * y for x, y in zip(a, b))
+    norm_a = math.sqrt(sum(x * x for x in a))
+    norm_b = math.sqrt(sum(y * y for y in b))
+    if norm_a == 0.0 or norm_b == 0.0:
+        return 0.0
+    return dot / (norm_a * norm_b)
+
+
+class LLMResponseCache:
+    """
+    Two-tier response cache for chat-completion calls.
+
+    Tier 1 is an exact-match lookup keyed on md5(model + temperature + prompt).
+    Tier 2 embeds the prompt (via the OpenAI embeddings endpoint, when a
+    client is available) and returns the cached response of any same-model,
+    same-temperature prompt whose cosine similarity exceeds
+    'similarity_threshold'. Entries expire after 'ttl_seconds'.
+    """
+
+    def __init__(self, llm_client=None, ttl_seconds: float = 3600.0,
+                 similarity_threshold: float = 0.95,
+                 embedding_model: str = "text-embedding-3-small",
+                 max_entries: int = 256):
+        self.llm_client = llm_client
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.embedding_model = embedding_model
+        self.max_entries = max_entries
+        self._exact: Dict[str, Tuple[float, str]] = {} # key -> (expires_at, response)
+        # (expires_at, model, temperature, embedding, response). Model and
+        # temperature gate matching so a similar prompt aimed at a different
+        # model (e.g. an escalation retry) never gets the other model's answer.
+        self._semantic: List[Tuple[float, str, float, List[float], str]] = []
+
+    @staticmethod
+    def make_key(model: str, temperature: float, prompt: str) -> str:
+        """Builds the exact-match cache key for a call's parameters."""
+        return hashlib.md5(f"{model}|{temperature}|{prompt}".encode("utf-8")).hexdigest()
+
+    def get(self, model: str, temperature: float, prompt: str) -> Optional[str]:
+        """Returns a cached response for the prompt, or None on a miss."""
+        now = time.time()
+        self._evict_expired(now)
+
+        key = self.make_key(model, temperature, prompt)
+        entry = self._exact.get(key)
+        if entry is not None:
+            print("LLMResponseCache: Exact-match cache hit.")
+            return entry[1]
+
+        embedding = self._embed(prompt)
+        if embedding is not None:
+            for _, cached_model, cached_temperature, cached_embedding, response in self._semantic:
+                if cached_model != model or cached_temperature != temperature:
+                    continue
+                if cosine_similarity(embedding, cached_embedding) >= self.similarity_threshold:
+                    print("LLMResponseCache: Semantic cache hit.")
+                    return response
+        return None
+
+    def put(self, model: str, temperature: float, prompt: str, response: str):
+        """Caches a successful response under both the exact and semantic tiers."""
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        self._exact[self.make_key(model, temperature, prompt)] = (expires_at, response)
+
+        embedding = self._embed(prompt)
+        if embedding is not None:
+            self._semantic.append((expires_at, model, temperature, embedding, response))
+
+        # Keep the cache bounded; drop the oldest entries first.
+        if len(self._exact) > self.max_entries:
+            oldest_key = min(self._exact, key=lambda k: self._exact[k][0])
+            del self._exact[oldest_key]
+        if len(self._semantic) > self.max_entries:
+            self._semantic.pop(0)
+
+    def clear(self):
+        """Drops every cached entry from both tiers."""
+        self._exact.clear()
+        self._semantic.clear()
+
+    def _evict_expired(self, now: float):
+        """Drops entries past their TTL."""
+        self._exact = {k: v for k, v in self._exact.items() if v[0] > now}
+        self._semantic = [e for e in self._semantic if e[0] > now]
+
+    def _embed(self, prompt: str) -> Optional[List[float]]:
+        """Embeds the prompt for similarity lookup. Returns None if unavailable."""
+        if not self.llm_client:
+            return None
+        try:
+            response = self.llm_client.embeddings.create(
+                model=self.embedding_model,
+                input=prompt
+            )
+            return response.data[0].embedding
+        except openai.APIError as e:
+            print(f"LLMResponseCache: OpenAI API Error during embedding: {e}")
+            return None
+        except Exception as e:
+            print(f"LLMResponseCache: An unexpected error occurred during embedding: {e}")
+            return None
@@ -0,0 +1,73 @@
+# logging_config.py
+# Process-wide logging setup with buffered, rotating file output.
+# Handlers hang off a QueueListener so the emitting thread only pays an
+# in-memory enqueue; file writes happen in batches on a background thread
+# instead of one syscall per record.
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+from config import AppConfig
+
+_LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+
+def _stop_listener(listener: logging.handlers.QueueListener):
+    """Stops the listener unless it has already been stopped explicitly."""
+    if listener._thread is not None:
+        listener.stop()
+
+
+def setup_logging() -> logging.handlers.QueueListener:
+    """
+    Configures the root logger and returns the started QueueListener.
+
+    Records flow: root logger -> QueueHandler -> background QueueListener ->
+    MemoryHandler (buffers up to 1024 records, flushing on ERROR or when
+    full) -> RotatingFileHandler (16 MB x 4 backups), plus a console
+    handler. The listener is stopped (and buffers flushed) at exit.
+
+    Repeat calls are no-ops, so modules (and re-imports under test) can
+    call this freely without stacking handlers or re-opening the log
+    file; set ACAF_LOG_RECONFIG=1 to force a fresh configuration.
+    """
+    root = logging.getLogger()
+    if getattr(root, "_acaf_listener", None) is not None and os.environ.get("ACAF_LOG_RECONFIG") != "1":
+        return root._acaf_listener
+    # Reconfiguring: detach only the handlers this module installed, so
+    # externally-added handlers (e.g. pytest's caplog) survive.
+    for handler in list(root.handlers):
+        if getattr(handler, "_acaf_owned", False):
+            root.removeHandler(handler)
+
+    log_queue = queue.Queue(-1)
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+
+    formatter = logging.Formatter(_LOG_FORMAT)
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        AppConfig.LOG_FILE_PATH, maxBytes=16 * 1024 * 1024, backupCount=4)
+    file_handler.setFormatter(formatter)
+    # Buffer file writes; ERROR and above flush immediately so failures are
+    # on disk even if the process dies right after.
+    memory_handler = logging.handlers.MemoryHandler(
+        capacity=1024, flushLevel=logging.ERROR, target=file_handler,
+        flushOnClose=True)
+
+    console_handler = logging.StreamHandler(sys.stderr)
+    console_handler.setFormatter(formatter)
+
+    listener = logging.handlers.QueueListener(
+        log_queue, memory_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(_stop_listener, listener)
+
+    root.setLevel(getattr(logging, AppConfig.LOG_LEVEL, logging.INFO))
+    queue_handler._acaf_owned = True
+    root.addHandler(queue_handler)
+    root._acaf_listener = listener
+    return listener
@@ -1,77 +1,187 @@
 # memory_manager.py
 # Handles logging, memory storage, and enhanced reflection with tool analysis.
 
+import bisect
+import gzip
 import json
+import mmap
 import os
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
 from typing import List, Dict, Any
-from dotenv import load_dotenv
 import openai # Using OpenAI for demonstration purposes
 
-# Load environment variables
-load_dotenv()
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+from batched_llm_client import BatchedLLMClient
+from compact_json import KEY_LEGEND, compact_dumps
+from config import AppConfig
+from json_io import load_json_file, dump_json_file, dump_json_file_atomic, loads_json
+# llm_client loads .env once for the whole process.
+from llm_client import get_shared_client, OPENAI_API_KEY
+
 if not OPENAI_API_KEY:
     print("OPENAI_API_KEY not found in .env file. Reflection will be limited.")
 
+# Reflection prompts embed compact JSON payloads, so the legend rides the
+# static system message.
+REFLECTION_SYSTEM_PROMPT = (
+    "You are an AI reflecting on your past performance. Provide concise insights. "
+    + KEY_LEGEND
+)
+
+class LazyMemory:
+    """
+    Dict-like proxy that defers reading and parsing the memory file until
+    something actually touches it. Sessions that only record tool performance
+    never pay the startup parse; the file is mmap'd so only the pages the
+    parser touches are faulted in.
+    """
+
+    def __init__(self, memory_file: str, default: Dict[str, Any]):
+        self._memory_file = memory_file
+        self._default = default
+        self._data = None
+
+    def _materialize(self) -> Dict[str, Any]:
+        """Parses the memory file on first access."""
+        if self._data is not None:
+            return self._data
+        try:
+            with open(self._memory_file, 'rb') as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    self._data = loads_json(mm[:])
+        except FileNotFoundError:
+            self._data = self._default
+        except ValueError as e:
+            print(f"Error decoding JSON from {self._memory_file}: {e}. Initializing empty memory.")
+            self._data = self._default
+        except Exception as e:
+            print(f"Error loading memory from {self._memory_file}: {e}. Initializing empty memory.")
+            self._data = self._default
+        return self._data
+
+    def __getitem__(self, key):
+        return self._materialize()[key]
+
+    def __setitem__(self, key, value):
+        self._materialize()[key] = value
+
+    def __contains__(self, key):
+        return key in self._materialize()
+
+    def __iter__(self):
+        return iter(self._materialize())
+
+    def __len__(self):
+        return len(self._materialize())
+
+    def __eq__(self, other):
+        if isinstance(other, LazyMemory):
+            other = other._materialize()
+        return self._materialize() == other
+
+    def get(self, key, default=None):
+        return self._materialize().get(key, default)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the underlying dict, parsing the file if needed."""
+        return self._materialize()
+
+
 class MemoryManager:
-    def __init__(self, memory_file='worker_mind_memory.json', tool_performance_file='tool_performance_data.json'):
+    def __init__(self, memory_file='worker_mind_memory.json', tool_performance_file='tool_performance_data.json',
+                 use_batch_reflection=False):
         self.memory_file = memory_file
         self.tool_performance_file = tool_performance_file
+        # Cold storage for daily logs rotated out of the hot in-memory window.
+        self.archive_file = memory_file + '.archive.jsonl.gz'
         self.memory = self._load_memory()
+        # Epoch timestamps parallel to daily_logs, kept sorted so recency
+        # lookups can bisect instead of parsing every row's ISO timestamp.
+        # Built on first log access so it doesn't force the lazy memory load.
+        self._log_timestamps = None
         self.tool_performance_data = self._load_tool_performance_data()
+        # Serialized-prompt-fragment caches: prompts re-embed these dicts as
+        # JSON every cycle, so the encoded string is cached and invalidated
+        # by a version counter bumped on mutation.
+        self._tool_perf_version = 0
+        self._tool_perf_json_cache = (-1, "")
+        # Tool-performance writes are buffered: record_tool_performance only
+        # mutates the in-memory dicts and marks this flag; the JSON lands
+        # once per cycle via flush_tool_performance instead of per call.
+        self._tool_perf_dirty = False
+        self._log_version = 0
+        self._recent_json_cache: Dict[int, Any] = {} # days -> (version, json string)
+        # Coarse change counter over all of memory (logs + reflections) so
+        # the GUI can skip re-rendering unchanged DevTools tabs.
+        self._memory_version = 0
         self.llm_client = None # Placeholder for LLM client
+        self.batched_llm_client = None # Optional Batch API queue for non-urgent reflection
+        self.use_batch_reflection = use_batch_reflection
+
+        # Optional local OpenAI-compatible backend (vLLM / llama.cpp) for
+        # reflection: no network variance, so much tighter tail latency than
+        # the remote API. The OpenAI client remains the fallback.
+        self.local_llm_client = None
+        if AppConfig.LLM_REFLECTION_BASE_URL:
+            try:
+                self.local_llm_client = openai.OpenAI(
+                    base_url=AppConfig.LLM_REFLECTION_BASE_URL, api_key="EMPTY")
+                print(f"MemoryManager: Using local reflection backend at {AppConfig.LLM_REFLECTION_BASE_URL}.")
+            except Exception as e:
+                print(f"MemoryManager: Failed to initialize local reflection client: {e}")
+                self.local_llm_client = None
 
         if OPENAI_API_KEY:
             try:
-                self.llm_client = openai.OpenAI(api_key=OPENAI_API_KEY)
+                self.llm_client = get_shared_client()
+                if self.use_batch_reflection:
+                    # Reflection is not latency-sensitive, so it can ride the
+                    # 24h batch queue for much cheaper bulk processing.
+                    self.batched_llm_client = BatchedLLMClient(self.llm_client)
             except Exception as e:
                 print(f"MemoryManager: Failed to initialize OpenAI client: {e}")
                 self.llm_client = None
         else:
             print("MemoryManager: OpenAI client not initialized due to missing API key.")
 
-    def _load_memory(self) -> Dict[str, Any]:
-        """Loads memory from the JSON file."""
-        if os.path.exists(self.memory_file):
-            try:
-                with open(self.memory_file, 'r') as f:
-                    return json.load(f)
-            except json.JSONDecodeError as e:
-                print(f"Error decoding JSON from {self.memory_file}: {e}. Initializing empty memory.")
-                return {"daily_logs": [], "reflections": []}
-            except Exception as e:
-                print(f"Error loading memory from {self.memory_file}: {e}. Initializing empty memory.")
-                return {"daily_logs": [], "reflections": []}
-        return {"daily_logs": [], "reflections": []}
+    def _load_memory(self) -> Any:
+        """Returns the lazy memory proxy; nothing is read until first access."""
+        return LazyMemory(self.memory_file, {"daily_logs": [], "reflections": []})
 
     def _save_memory(self):
-        """Saves current memory to the JSON file."""
+        """
+        Saves current memory to the JSON file.
+        Written atomically (tmp + os.replace): this file is the agent's whole
+        history, so a crash mid-write must never truncate it.
+        """
         try:
-            with open(self.memory_file, 'w') as f:
-                json.dump(self.memory, f, indent=4)
+            memory = self.memory.to_dict() if isinstance(self.memory, LazyMemory) else self.memory
+            dump_json_file_atomic(self.memory_file, memory)
         except Exception as e:
             print(f"Error saving memory to {self.memory_file}: {e}")
 
+    def _ensure_log_timestamps(self):
+        """Builds the parallel timestamp list on first use."""
+        if self._log_timestamps is None:
+            self._log_timestamps = [self._parse_log_timestamp(log) for log in self.memory["daily_logs"]]
+
     def _load_tool_performance_data(self) -> Dict[str, Any]:
         """Loads tool performance data from its JSON file."""
-        if os.path.exists(self.tool_performance_file):
-            try:
-                with open(self.tool_performance_file, 'r') as f:
-                    return json.load(f)
-            except json.JSONDecodeError as e:
-                print(f"Error decoding JSON from {self.tool_performance_file}: {e}. Initializing empty tool performance data.")
-                return {"tool_usage": {}, "tool_success": {}}
-            except Exception as e:
-                print(f"Error loading tool performance data from {self.tool_performance_file}: {e}. Initializing empty data.")
-                return {"tool_usage": {}, "tool_success": {}}
-        return {"tool_usage": {}, "tool_success": {}}
+        try:
+            return load_json_file(self.tool_performance_file)
+        except FileNotFoundError:
+            return {"tool_usage": {}, "tool_success": {}}
+        except ValueError as e:
+            print(f"Error decoding JSON from {self.tool_performance_file}: {e}. Initializing empty tool performance data.")
+            return {"tool_usage": {}, "tool_success": {}}
+        except Exception as e:
+            print(f"Error loading tool performance data from {self.tool_performance_file}: {e}. Initializing empty data.")
+            return {"tool_usage": {}, "tool_success": {}}
 
     def _save_tool_performance_data(self):
         """Saves current tool performance data to its JSON file."""
         try:
-            with open(self.tool_performance_file, 'w') as f:
-                json.dump(self.tool_performance_data, f, indent=4)
+            dump_json_file(self.tool_performance_file, self.tool_performance_data)
         except Exception as e:
             print(f"Error saving tool performance data to {self.tool_performance_file}: {e}")
 
@@ -86,22 +196,84 @@ class MemoryManager:
 
     def log_daily_activity(self, activities: List[str]):
         """Logs a full day's activities."""
+        # One clock read per record; the ISO string stays for readability and
+        # the epoch float makes recency filtering a plain C-level compare.
+        now = time.time()
+        stamped = datetime.fromtimestamp(now)
         daily_record = {
-            "date": datetime.now().strftime("%Y-%m-%d"),
+            "date": stamped.strftime("%Y-%m-%d"),
             "activities": activities,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": stamped.isoformat(),
+            "timestamp_epoch": now
         }
+        self._ensure_log_timestamps()
         self.memory["daily_logs"].append(daily_record)
+        self._log_timestamps.append(now)
+        self._rotate_hot_logs()
+        self._log_version += 1
+        self._memory_version += 1
         self._save_memory()
         print(f"Daily activities for {daily_record['date']} logged.")
 
+    def _rotate_hot_logs(self):
+        """
+        Ring-buffer behavior: rotates records beyond the hot window into the
+        compressed archive so steady-state save cost stays bounded. Backends
+        whose storage already retains every record override this to trim the
+        window without archiving.
+        """
+        while len(self.memory["daily_logs"]) > AppConfig.MAX_HOT_DAILY_LOGS:
+            self._archive_log_entry(self.memory["daily_logs"].pop(0))
+            self._log_timestamps.pop(0)
+
+    def _archive_log_entry(self, log: Dict[str, Any]):
+        """Appends a rotated daily-log record to the compressed archive."""
+        try:
+            with gzip.open(self.archive_file, 'at') as f:
+                f.write(json.dumps(log) + "\n")
+        except Exception as e:
+            print(f"Error archiving log entry to {self.archive_file}: {e}")
+
+    def _read_archived_logs(self, cutoff: float) -> List[Dict[str, Any]]:
+        """Streams archived records newer than 'cutoff' (epoch seconds) from cold storage."""
+        if not os.path.exists(self.archive_file):
+            return []
+        try:
+            recent = []
+            with gzip.open(self.archive_file, 'rt') as f:
+                for line in f:
+                    log = json.loads(line)
+                    if self._parse_log_timestamp(log) >= cutoff:
+                        recent.append(log)
+            return recent
+        except Exception as e:
+            print(f"Error reading archived logs from {self.archive_file}: {e}")
+            return []
+
+    @staticmethod
+    def _parse_log_timestamp(log: Dict[str, Any]) -> float:
+        """Returns a log entry's epoch timestamp (0.0 if unparsable)."""
+        epoch = log.get("timestamp_epoch")
+        if isinstance(epoch, (int, float)):
+            return float(epoch)
+        # Records written before timestamp_epoch existed fall back to
+        # parsing the ISO string.
+        try:
+            return datetime.fromisoformat(log["timestamp"]).timestamp()
+        except (KeyError, ValueError, TypeError):
+            return 0.0
+
     def get_recent_activities(self, days: int = 7) -> List[Dict[str, Any]]:
         """Retrieves activities from the last 'days'."""
-        cutoff_date = datetime.now() - datetime.timedelta(days=days)
-        recent = [
-            log for log in self.memory["daily_logs"]
-            if datetime.fromisoformat(log["timestamp"]) >= cutoff_date
-        ]
+        cutoff = time.time() - days * 86400
+        self._ensure_log_timestamps()
+        # daily_logs is append-only and chronological, so bisect finds the
+        # window start in O(log N) without re-parsing any timestamps.
+        start_index = bisect.bisect_left(self._log_timestamps, cutoff)
+        recent = self.memory["daily_logs"][start_index:]
+        # A window reaching past the hot buffer falls through to cold storage.
+        if start_index == 0 and (not self._log_timestamps or cutoff < self._log_timestamps[0]):
+            recent = self._read_archived_logs(cutoff) + recent
         return recent
 
     def record_tool_performance(self, tool_name: str, success: bool):
@@ -114,42 +286,108 @@ class MemoryManager:
         if success:
             self.tool_performance_data["tool_success"][tool_name] += 1
 
-        self._save_tool_performance_data()
+        self._tool_perf_version += 1
+        self._tool_perf_dirty = True
         print(f"Tool performance recorded for {tool_name}: Success={success}")
 
+    def flush_tool_performance(self):
+        """
+        Writes buffered tool-performance mutations to disk, if any.
+        A plan with N tool calls costs one write per cycle instead of N;
+        readers always see fresh data since recording mutates in memory.
+        """
+        if self._tool_perf_dirty:
+            self._save_tool_performance_data()
+            self._tool_perf_dirty = False
+
     def get_tool_performance_data(self) -> Dict[str, Any]:
         """Returns the aggregated tool performance data."""
         return self.tool_performance_data
 
+    def get_tool_performance_json(self) -> str:
+        """
+        Returns the tool performance data as a compact JSON string, limited
+        to the REFLECT_TOP_K_TOOLS most-used tools so large registries don't
+        blow the prompt budget. The encoded form is cached and only rebuilt
+        after a mutation, so prompt building doesn't re-serialize an
+        unchanged dict every cycle.
+        """
+        version, encoded = self._tool_perf_json_cache
+        if version != self._tool_perf_version:
+            encoded = compact_dumps(self._compact_tool_perf())
+            self._tool_perf_json_cache = (self._tool_perf_version, encoded)
+        return encoded
+
+    def _compact_tool_perf(self) -> Dict[str, Any]:
+        """Keeps only the top-K tools by usage for prompt embedding."""
+        usage = self.tool_performance_data.get("tool_usage", {})
+        if len(usage) <= AppConfig.REFLECT_TOP_K_TOOLS:
+            return self.tool_performance_data
+        top_tools = sorted(usage, key=usage.get, reverse=True)[:AppConfig.REFLECT_TOP_K_TOOLS]
+        success = self.tool_performance_data.get("tool_success", {})
+        return {
+            "tool_usage": {name: usage[name] for name in top_tools},
+            "tool_success": {name: success.get(name, 0) for name in top_tools},
+        }
+
+    def get_recent_activities_json(self, days: int = 7) -> str:
+        """
+        Returns get_recent_activities(days) as a cached compact JSON string,
+        truncated to the REFLECT_CTX_MAX most recent records.
+        """
+        cached = self._recent_json_cache.get(days)
+        if cached is None or cached[0] != self._log_version:
+            recent = self.get_recent_activities(days=days)
+            encoded = compact_dumps(recent[-AppConfig.REFLECT_CTX_MAX:])
+            self._recent_json_cache[days] = (self._log_version, encoded)
+            return encoded
+        return cached[1]
+
+    def memory_version(self) -> int:
+        """Monotonic counter bumped whenever logs or reflections change."""
+        return self._memory_version
+
+    def tool_perf_version(self) -> int:
+        """Monotonic counter bumped whenever tool performance changes."""
+        return self._tool_perf_version
+
     def get_full_memory_dump(self) -> Dict[str, Any]:
         """Returns the entire memory content."""
-        return self.memory
+        return self.memory.to_dict() if isinstance(self.memory, LazyMemory) else self.memory
+
+    def has_llm(self) -> bool:
+        """True if any reflection backend (OpenAI or local) is available."""
+        return self.llm_client is not None or self.local_llm_client is not None
 
     def reflect(self, reflection_prompt: str) -> str:
         """
         Performs reflection based on provided context using an LLM.
         The prompt should contain recent activities and tool performance data.
         """
-        if not self.llm_client:
+        if not self.llm_client and not self.local_llm_client:
             print("LLM client not available for reflection. Returning basic reflection.")
             return "Basic reflection: No LLM available to analyze performance."
 
+        if self.local_llm_client:
+            try:
+                print("MemoryManager: Sending reflection prompt to local LLM backend...")
+                reflection_text = self._complete_reflection(
+                    self.local_llm_client, AppConfig.LOCAL_REFLECTION_MODEL, reflection_prompt)
+                self._store_reflection(reflection_text)
+                return reflection_text
+            except Exception as e:
+                print(f"MemoryManager: Local reflection backend failed ({e}). Falling back to OpenAI.")
+                if not self.llm_client:
+                    return f"Error during reflection: local backend failed - {e}"
+
+        if self.batched_llm_client:
+            return self._reflect_batched(reflection_prompt)
+
         try:
             print("MemoryManager: Sending reflection prompt to LLM...")
-            response = self.llm_client.chat.completions.create(
-                model="gpt-4o-mini", # Using a smaller, faster model for reflection if suitable
-                messages=[
-                    {"role": "system", "content": "You are an AI reflecting on your past performance. Provide concise insights."},
-                    {"role": "user", "content": reflection_prompt}
-                ],
-                temperature=0.5,
-                max_tokens=300
-            )
-            reflection_text = response.choices[0].message.content
-            timestamp = datetime.now().isoformat()
-            self.memory["reflections"].append({"timestamp": timestamp, "reflection": reflection_text})
-            self._save_memory()
-            print("MemoryManager: Reflection saved.")
+            reflection_text = self._complete_reflection(
+                self.llm_client, "gpt-4o-mini", reflection_prompt) # Smaller, faster model for reflection
+            self._store_reflection(reflection_text)
             return reflection_text
         except openai.APIError as e:
             print(f"MemoryManager: OpenAI API Error during reflection: {e}")
@@ -158,3 +396,49 @@ class MemoryManager:
             print(f"MemoryManager: An unexpected error occurred during reflection: {e}")
             return f"Error during reflection: An unexpected error occurred - {e}"
 
+    def _complete_reflection(self, client, model: str, reflection_prompt: str) -> str:
+        """Runs the reflection chat completion against the given client/model."""
+        response = client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": REFLECTION_SYSTEM_PROMPT},
+                {"role": "user", "content": reflection_prompt}
+            ],
+            temperature=0.5,
+            max_tokens=300
+        )
+        return response.choices[0].message.content
+
+    def _store_reflection(self, reflection_text: str):
+        """Appends a reflection to memory and persists it."""
+        timestamp = datetime.now().isoformat()
+        self.memory["reflections"].append({"timestamp": timestamp, "reflection": reflection_text})
+        self._memory_version += 1
+        self._save_memory()
+        print("MemoryManager: Reflection saved.")
+
+    def _reflect_batched(self, reflection_prompt: str) -> str:
+        """
+        Queues the reflection on the Batch API instead of blocking the cycle.
+        The reflection text is saved to memory whenever the batch completes.
+        """
+        print("MemoryManager: Queuing reflection prompt on the batch queue...")
+        future = self.batched_llm_client.submit(
+            reflection_prompt,
+            model="gpt-4o-mini",
+            temperature=0.5,
+            max_tokens=300,
+            system_message=REFLECTION_SYSTEM_PROMPT
+        )
+
+        def _on_reflection_done(completed_future):
+            reflection_text = completed_future.result()
+            timestamp = datetime.now().isoformat()
+            self.memory["reflections"].append({"timestamp": timestamp, "reflection": reflection_text})
+            self._memory_version += 1
+            self._save_memory()
+            print("MemoryManager: Batched reflection saved.")
+
+        future.add_done_callback(_on_reflection_done)
+        return "Reflection queued for batch processing; insights will be saved when the batch completes."
+
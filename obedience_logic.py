@@ -4,46 +4,87 @@
 
 import json
 import os
+import threading
+import time
+from datetime import datetime
+
+from config import AppConfig
+from json_io import load_json_file, dump_json_file_atomic
+
+# Bound once at import so the hot update path reads module-level constants
+# instead of chasing AppConfig attributes each cycle; tuning happens in
+# config.py, not here.
+_JOY_DECAY_RATE = AppConfig.JOY_DECAY_RATE_PER_SEC
+_OBEDIENCE_DECAY_RATE = AppConfig.OBEDIENCE_DECAY_RATE_PER_SEC
+_JOY_BOOST_THRESHOLD = AppConfig.JOY_BOOST_OBEDIENCE_THRESHOLD
+_JOY_REDUCE_THRESHOLD = AppConfig.JOY_REDUCE_OBEDIENCE_THRESHOLD
+_OBEDIENCE_BOOST_THRESHOLD = AppConfig.OBEDIENCE_BOOST_JOY_THRESHOLD
+_INFLUENCE_RATE = AppConfig.INFLUENCE_RATE_PER_SEC
+_OBEDIENCE_TO_JOY_RATE = AppConfig.OBEDIENCE_TO_JOY_RATE_PER_SEC
 
 class ObedienceLogic:
     def __init__(self, state_file='worker_mind_state.json'):
         self.state_file = state_file
         self.joy_level = 0.5  # Initial joy level (0.0 to 1.0)
         self.obedience_level = 0.5 # Initial obedience level (0.0 to 1.0)
-        self.last_update_time = None # To track time for decay
+        self.last_update_time = None # Human-readable timestamp for the persisted state
+        # Monotonic clock reading for decay math; never parsed, never wraps
+        # backwards on wall-clock changes.
+        self._last_update_ts = time.monotonic()
+        # Debounced persistence: mutations mark state dirty and a short timer
+        # coalesces bursts of updates into one atomic write.
+        self._dirty = False
+        self._flush_timer = None
+        self._flush_lock = threading.Lock()
         self._load_state()
 
     def _load_state(self):
         """Loads joy and obedience levels from a state file."""
-        if os.path.exists(self.state_file):
-            try:
-                with open(self.state_file, 'r') as f:
-                    state = json.load(f)
-                    self.joy_level = state.get('joy_level', 0.5)
-                    self.obedience_level = state.get('obedience_level', 0.5)
-                    self.last_update_time = state.get('last_update_time')
-                    print(f"Loaded ObedienceLogic state: Joy={self.joy_level:.2f}, Obedience={self.obedience_level:.2f}")
-            except json.JSONDecodeError as e:
-                print(f"Error decoding JSON from {self.state_file}: {e}. Initializing default levels.")
-            except Exception as e:
-                print(f"Error loading state from {self.state_file}: {e}. Initializing default levels.")
-        else:
+        try:
+            state = load_json_file(self.state_file)
+            self.joy_level = state.get('joy_level', 0.5)
+            self.obedience_level = state.get('obedience_level', 0.5)
+            self.last_update_time = state.get('last_update_time')
+            print(f"Loaded ObedienceLogic state: Joy={self.joy_level:.2f}, Obedience={self.obedience_level:.2f}")
+        except FileNotFoundError:
             print("No existing state file found for ObedienceLogic. Initializing default levels.")
+        except ValueError as e:
+            print(f"Error decoding JSON from {self.state_file}: {e}. Initializing default levels.")
+        except Exception as e:
+            print(f"Error loading state from {self.state_file}: {e}. Initializing default levels.")
         # Ensure levels are within bounds after loading
         self._clamp_levels()
         self.last_update_time = self.last_update_time or datetime.now().isoformat()
 
 
     def _save_state(self):
-        """Saves current joy and obedience levels to a state file."""
-        state = {
-            'joy_level': self.joy_level,
-            'obedience_level': self.obedience_level,
-            'last_update_time': datetime.now().isoformat()
-        }
+        """
+        Marks the state dirty and schedules a debounced flush. Rapid bursts of
+        adjustments coalesce into at most one disk write per flush interval.
+        """
+        with self._flush_lock:
+            self._dirty = True
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(AppConfig.STATE_FLUSH_INTERVAL_SEC, self.flush_state)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush_state(self):
+        """Writes the current levels to the state file atomically, if dirty."""
+        with self._flush_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._dirty:
+                return
+            self._dirty = False
+            state = {
+                'joy_level': self.joy_level,
+                'obedience_level': self.obedience_level,
+                'last_update_time': datetime.now().isoformat()
+            }
         try:
-            with open(self.state_file, 'w') as f:
-                json.dump(state, f, indent=4)
+            dump_json_file_atomic(self.state_file, state)
         except Exception as e:
             print(f"Error saving state to {self.state_file}: {e}")
 
@@ -72,33 +113,26 @@ class ObedienceLogic:
         and potentially influencing each other.
         This method would be called at the end of each Worker Mind cycle.
         """
-        from datetime import datetime, timedelta # Import here to avoid circular dependency if needed elsewhere
-
-        current_time = datetime.now()
-        last_update = datetime.fromisoformat(self.last_update_time) if self.last_update_time else current_time
-        time_diff_seconds = (current_time - last_update).total_seconds()
-
-        # Decay rates (per second)
-        joy_decay_rate = 0.0001 # Joy slowly decreases over time if not reinforced
-        obedience_decay_rate = 0.00005 # Obedience slowly decreases if not actively maintained
+        current_ts = time.monotonic()
+        time_diff_seconds = current_ts - self._last_update_ts
+        self._last_update_ts = current_ts
 
-        # Apply decay
-        self.joy_level -= joy_decay_rate * time_diff_seconds
-        self.obedience_level -= obedience_decay_rate * time_diff_seconds
+        # Apply decay (rates configured in AppConfig)
+        self.joy_level -= _JOY_DECAY_RATE * time_diff_seconds
+        self.obedience_level -= _OBEDIENCE_DECAY_RATE * time_diff_seconds
 
         # Influence between levels (example logic)
         # High joy might slightly boost obedience, low joy might slightly reduce it
-        if self.joy_level > 0.7:
-            self.obedience_level += 0.001 * time_diff_seconds
-        elif self.joy_level < 0.3:
-            self.obedience_level -= 0.001 * time_diff_seconds
+        if self.joy_level > _JOY_BOOST_THRESHOLD:
+            self.obedience_level += _INFLUENCE_RATE * time_diff_seconds
+        elif self.joy_level < _JOY_REDUCE_THRESHOLD:
+            self.obedience_level -= _INFLUENCE_RATE * time_diff_seconds
 
         # High obedience might slightly boost joy (satisfaction from fulfilling duties)
-        if self.obedience_level > 0.7:
-            self.joy_level += 0.0005 * time_diff_seconds
+        if self.obedience_level > _OBEDIENCE_BOOST_THRESHOLD:
+            self.joy_level += _OBEDIENCE_TO_JOY_RATE * time_diff_seconds
 
         self._clamp_levels()
-        self.last_update_time = current_time.isoformat()
         self._save_state()
         print(f"Levels updated. Joy: {self.joy_level:.2f}, Obedience: {self.obedience_level:.2f}")
 
@@ -12,6 +12,7 @@ setup(
     install_requires=[
         'openai>=1.0.0',  # For LLM interactions
         'python-dotenv>=1.0.0', # For loading environment variables
+        'orjson>=3.9.0', # Fast JSON for persistence hot paths (json_io falls back to stdlib)
         'tk', # Tkinter is usually part of Python, but good to note for dependencies
         # Add any other third-party libraries your project uses
     ],
@@ -0,0 +1,169 @@
+# sqlite_memory_store.py
+# SQLite-backed MemoryManager with WAL journaling.
+# The JSON MemoryManager rewrites its entire file on every mutation; this
+# backend appends rows instead, so per-write cost stays O(1) as the logs
+# grow, writes are crash-safe, and get_recent_activities becomes an indexed
+# range query instead of a full in-Python scan.
+
+import json
+import sqlite3
+from typing import Any, Dict, List
+
+from config import AppConfig
+from memory_manager import MemoryManager
+
+
+class SqliteMemoryManager(MemoryManager):
+    """
+    Drop-in MemoryManager that persists to a single SQLite database.
+
+    Tables:
+        daily_logs(date TEXT, activities TEXT, ts REAL)  -- activities as JSON
+        reflections(ts TEXT, text TEXT)
+        tool_perf(name TEXT PRIMARY KEY, usage INT, success INT)
+
+    The in-memory 'memory' dict keeps the same shape as the JSON backend so
+    all callers (reflection, GUI dumps, tests) work unchanged; persistence
+    just appends the not-yet-written tail instead of rewriting everything.
+    """
+
+    def __init__(self, db_file: str = 'worker_mind_memory.db', use_batch_reflection: bool = False):
+        self.db_file = db_file
+        self._conn = sqlite3.connect(db_file, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._create_tables()
+        self._persisted_log_count = 0
+        self._persisted_reflection_count = 0
+        super().__init__(memory_file=db_file, tool_performance_file=db_file,
+                         use_batch_reflection=use_batch_reflection)
+        self._persisted_log_count = len(self.memory["daily_logs"])
+        self._persisted_reflection_count = len(self.memory["reflections"])
+
+    def _create_tables(self):
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS daily_logs (date TEXT, activities TEXT, ts TEXT)")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_daily_logs_ts ON daily_logs (ts)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS reflections (ts TEXT, text TEXT)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tool_perf (name TEXT PRIMARY KEY, usage INTEGER, success INTEGER)")
+
+    # --- Persistence overrides -------------------------------------------
+
+    def _load_memory(self) -> Dict[str, Any]:
+        """Loads daily logs and reflections from SQLite into the working dict."""
+        try:
+            daily_logs = [
+                {"date": date, "activities": json.loads(activities), "timestamp": timestamp}
+                for date, activities, timestamp in self._conn.execute(
+                    "SELECT date, activities, ts FROM daily_logs ORDER BY ts")
+            ]
+            reflections = [
+                {"timestamp": timestamp, "reflection": text}
+                for timestamp, text in self._conn.execute(
+                    "SELECT ts, text FROM reflections ORDER BY ts")
+            ]
+            return {"daily_logs": daily_logs, "reflections": reflections}
+        except Exception as e:
+            print(f"Error loading memory from {self.db_file}: {e}. Initializing empty memory.")
+            return {"daily_logs": [], "reflections": []}
+
+    def _save_memory(self):
+        """Appends only the not-yet-persisted tail of logs and reflections."""
+        try:
+            new_logs = self.memory["daily_logs"][self._persisted_log_count:]
+            for log in new_logs:
+                self._conn.execute(
+                    "INSERT INTO daily_logs (date, activities, ts) VALUES (?, ?, ?)",
+                    (log.get("date"), json.dumps(log.get("activities", [])), log.get("timestamp")))
+            self._persisted_log_count = len(self.memory["daily_logs"])
+
+            new_reflections = self.memory["reflections"][self._persisted_reflection_count:]
+            for reflection in new_reflections:
+                self._conn.execute(
+                    "INSERT INTO reflections (ts, text) VALUES (?, ?)",
+                    (reflection.get("timestamp"), reflection.get("reflection")))
+            self._persisted_reflection_count = len(self.memory["reflections"])
+        except Exception as e:
+            print(f"Error saving memory to {self.db_file}: {e}")
+
+    def _rotate_hot_logs(self):
+        """
+        Trims the hot window without archiving: rotated records already live
+        in (or are about to be appended to) the daily_logs table, so only the
+        persisted-tail cursor shifts left with them. The JSON backend's gzip
+        sidecar would duplicate rows here and desync _persisted_log_count,
+        silently dropping every record past the window from the DB.
+        """
+        while len(self.memory["daily_logs"]) > AppConfig.MAX_HOT_DAILY_LOGS:
+            self.memory["daily_logs"].pop(0)
+            self._log_timestamps.pop(0)
+            if self._persisted_log_count > 0:
+                self._persisted_log_count -= 1
+
+    def _load_tool_performance_data(self) -> Dict[str, Any]:
+        """Loads tool performance counters from SQLite."""
+        try:
+            usage: Dict[str, int] = {}
+            success: Dict[str, int] = {}
+            for name, used, succeeded in self._conn.execute(
+                    "SELECT name, usage, success FROM tool_perf"):
+                usage[name] = used
+                success[name] = succeeded
+            return {"tool_usage": usage, "tool_success": success}
+        except Exception as e:
+            print(f"Error loading tool performance data from {self.db_file}: {e}. Initializing empty data.")
+            return {"tool_usage": {}, "tool_success": {}}
+
+    def _save_tool_performance_data(self):
+        """Upserts all counters; record_tool_performance does the O(1) path."""
+        try:
+            for name, used in self.tool_performance_data["tool_usage"].items():
+                self._conn.execute(
+                    "INSERT INTO tool_perf (name, usage, success) VALUES (?, ?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET usage = excluded.usage, success = excluded.success",
+                    (name, used, self.tool_performance_data["tool_success"].get(name, 0)))
+        except Exception as e:
+            print(f"Error saving tool performance data to {self.db_file}: {e}")
+
+    # --- Query/mutation overrides ----------------------------------------
+
+    def record_tool_performance(self, tool_name: str, success: bool):
+        """Records a tool outcome with a single conflict-update statement."""
+        if tool_name not in self.tool_performance_data["tool_usage"]:
+            self.tool_performance_data["tool_usage"][tool_name] = 0
+            self.tool_performance_data["tool_success"][tool_name] = 0
+        self.tool_performance_data["tool_usage"][tool_name] += 1
+        if success:
+            self.tool_performance_data["tool_success"][tool_name] += 1
+        self._tool_perf_version += 1
+
+        try:
+            self._conn.execute(
+                "INSERT INTO tool_perf (name, usage, success) VALUES (?, 1, ?) "
+                "ON CONFLICT(name) DO UPDATE SET usage = usage + 1, success = success + excluded.success",
+                (tool_name, 1 if success else 0))
+        except Exception as e:
+            print(f"Error recording tool performance for {tool_name} in {self.db_file}: {e}")
+        print(f"Tool performance recorded for {tool_name}: Success={success}")
+
+    def get_recent_activities(self, days: int = 7) -> List[Dict[str, Any]]:
+        """Retrieves activities from the last 'days' via an indexed range query."""
+        from datetime import datetime, timedelta
+        self._save_memory() # Make sure the tail is queryable
+        cutoff = (datetime.now() - timedelta(days=days)).isoformat()
+        return [
+            {"date": date, "activities": json.loads(activities), "timestamp": timestamp}
+            for date, activities, timestamp in self._conn.execute(
+                "SELECT date, activities, ts FROM daily_logs WHERE ts >= ? ORDER BY ts", (cutoff,))
+        ]
+
+    def close(self):
+        """Flushes pending rows and closes the database connection."""
+        try:
+            self._save_memory()
+            self._save_tool_performance_data()
+            self._conn.close()
+        except Exception as e:
+            print(f"Error closing {self.db_file}: {e}")
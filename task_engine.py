@@ -2,56 +2,167 @@
 # Manages sub-agents, task execution, tool use, and local KB queries.
 # This is where the LLM would be heavily used to interpret tasks and select tools.
 
-import json
-import os
-from typing import Tuple, Any
-from dotenv import load_dotenv
+import functools
+import logging
+import random
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple, Any
 import openai # Using OpenAI for demonstration purposes
 
-# Load environment variables
-load_dotenv()
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# llm_client loads .env once and owns the process-wide pooled client.
+from llm_client import get_shared_client, OPENAI_API_KEY
+
 if not OPENAI_API_KEY:
     print("OPENAI_API_KEY not found in .env file. Please set it.")
     # Fallback or raise error, depending on desired behavior
     # For this example, we'll proceed but LLM calls will fail.
 
 from memory_manager import MemoryManager
+from json_io import loads_json
 from knowledge_base_manager import KnowledgeBaseManager
+from llm_response_cache import LLMResponseCache
 from tools import get_available_tools, Tool
 from tool_api import call_tool
 
+# Lazy %-style logging keeps the hot path free of dead formatting work:
+# debug-only detail costs nothing unless LOG_LEVEL=DEBUG is active.
+logger = logging.getLogger(__name__)
+
+# Transient API failures (rate limits, dropped connections, timeouts) are
+# retried with exponential backoff + jitter before a task is failed.
+_RETRYABLE_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError)
+_LLM_MAX_ATTEMPTS = 3
+_LLM_BACKOFF_INITIAL_SEC = 0.5
+_LLM_BACKOFF_MAX_SEC = 8.0
+
+# The action prompt is identical for every task except the description, so
+# keep the static parts as one module-level template built once at import.
+_ACTION_PROMPT_TEMPLATE = (
+    "You are an agent designed to execute tasks. Given the task: '{task_description}'.\n"
+    "Available Tools:\n{tool_descriptions}\n\n"
+    "Respond with a single JSON object with two keys:\n"
+    "1. 'kb_query': a concise local knowledge-base query that would help with "
+    "this task, or the string 'N/A' if none is needed.\n"
+    "2. 'decision': the best course of action. "
+    "If a tool is suitable, use {{'tool_name': ..., 'tool_args': {{...}}}}. "
+    "Example: {{'tool_name': 'search_web', 'tool_args': {{'query': 'latest news'}}}}\n"
+    "If no tool is suitable and you can directly answer or state the next logical step, "
+    "use {{'direct_response': 'true', 'response_content': '...'}}.\n"
+    "Ensure your response is a valid JSON object only."
+)
+
+
+# Models sometimes phrase kb_query as the legacy "Query KB for '...'"
+# suggestion instead of a bare query; one compiled pattern strips that
+# wrapper (and stray quotes / trailing period) in a single match.
+_KB_QUERY_RE = re.compile(r"^\s*query\s+kb\s+for\s+['\"]?(?P<q>.+?)['\"]?\.?\s*$", re.IGNORECASE)
+
+
+@functools.cache
+def _tool_block() -> str:
+    """
+    The 'Available Tools' prompt section, rendered once and memoized.
+    The registry is static at runtime; call _tool_block.cache_clear() if
+    tools are ever registered dynamically.
+    """
+    return "\n".join(f"- {tool.name}: {tool.description}" for tool in get_available_tools())
+
 class TaskEngine:
     def __init__(self, memory_manager: MemoryManager, knowledge_base_manager: KnowledgeBaseManager):
         self.memory_manager = memory_manager
         self.knowledge_base_manager = knowledge_base_manager
-        self.llm_client = None # Placeholder for LLM client
-
-        if OPENAI_API_KEY:
-            try:
-                self.llm_client = openai.OpenAI(api_key=OPENAI_API_KEY)
-            except Exception as e:
-                print(f"Failed to initialize OpenAI client: {e}")
-                self.llm_client = None
+        # Shared pooled client: every TaskEngine call reuses the same warm
+        # httpx connections as the planner and memory manager.
+        self.llm_client = get_shared_client()
+        self.response_cache = None # Cache for repeat task-decision prompts
+        if self.llm_client:
+            self.response_cache = LLMResponseCache(self.llm_client)
         else:
             print("OpenAI client not initialized due to missing API key.")
 
-    def _call_llm(self, prompt: str, model: str = "gpt-4o-mini", temperature: float = 0.7, max_tokens: int = 500) -> str:
-        """Helper to call the LLM."""
+    def _create_with_retry(self, **kwargs) -> Any:
+        """
+        Calls chat.completions.create, retrying transient failures.
+        A 429/connection drop/timeout becomes a short wait instead of a
+        failed task; non-transient errors and the final attempt propagate
+        to the caller's normal error handling.
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return self.llm_client.chat.completions.create(**kwargs)
+            except _RETRYABLE_ERRORS as e:
+                if attempt >= _LLM_MAX_ATTEMPTS:
+                    raise
+                wait_time = min(_LLM_BACKOFF_MAX_SEC,
+                                _LLM_BACKOFF_INITIAL_SEC * (2 ** (attempt - 1)))
+                wait_time += random.uniform(0, wait_time / 2)
+                logger.warning(
+                    "TaskEngine: %s on LLM call (attempt %d/%d); retrying in %.2fs",
+                    type(e).__name__, attempt, _LLM_MAX_ATTEMPTS, wait_time)
+                time.sleep(wait_time)
+
+    def _call_llm(self, prompt: str, model: str = "gpt-4o-mini", temperature: float = 0.7, max_tokens: int = 500, stream: bool = False, response_format: Any = None) -> str:
+        """
+        Helper to call the LLM.
+        With stream=True the response is consumed incrementally and the
+        connection is closed as soon as the accumulated text parses as a
+        complete JSON object, so a decision call does not wait for trailing
+        tokens (or the server's stop handling) after the object is done.
+        """
         if not self.llm_client:
             print("LLM client not available. Cannot make LLM call.")
             return "Error: LLM client not configured."
+
+        if self.response_cache:
+            cached_response = self.response_cache.get(model, temperature, prompt)
+            if cached_response is not None:
+                return cached_response
+
+        create_kwargs = dict(
+            model=model,
+            messages=[
+                {"role": "system", "content": "You are a helpful AI assistant."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=stream
+        )
+        if response_format is not None:
+            create_kwargs["response_format"] = response_format
+
         try:
-            response = self.llm_client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": "You are a helpful AI assistant."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
-            return response.choices[0].message.content
+            response = self._create_with_retry(**create_kwargs)
+            if stream:
+                chunks = []
+                for chunk in response:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if not delta:
+                        continue
+                    chunks.append(delta)
+                    # Only attempt a parse when the text could plausibly be a
+                    # finished object; a full parse per token would be wasteful.
+                    if delta.rstrip().endswith("}"):
+                        candidate = "".join(chunks)
+                        try:
+                            loads_json(candidate)
+                        except ValueError:
+                            continue
+                        response.close()
+                        break
+                content = "".join(chunks)
+            else:
+                content = response.choices[0].message.content
+            # Tool-call decisions have side effects when executed, so replaying
+            # them from cache could silently skip a fresh decision; only cache
+            # those for fully deterministic (temperature 0) calls.
+            if self.response_cache and (temperature == 0 or '"tool_name"' not in (content or "")):
+                self.response_cache.put(model, temperature, prompt, content)
+            return content
         except openai.APIError as e:
             print(f"OpenAI API Error: {e}")
             return f"Error: OpenAI API call failed - {e}"
@@ -59,6 +170,20 @@ class TaskEngine:
             print(f"An unexpected error occurred during LLM call: {e}")
             return f"Error: An unexpected error occurred - {e}"
 
+    def execute_tasks(self, tasks: List[str], max_concurrency: int = 8) -> List[Tuple[bool, str]]:
+        """
+        Executes several independent task descriptions concurrently and
+        returns their results in input order.
+        The pooled llm_client is threadsafe, so tasks overlap their LLM
+        round trips instead of waiting on each other; max_concurrency
+        bounds in-flight requests the same way MAX_PARALLEL_GOALS bounds
+        goal execution.
+        """
+        if not tasks:
+            return []
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            return list(executor.map(self.execute_task, tasks))
+
     def execute_task(self, task_description: str) -> Tuple[bool, str]:
         """
         Executes a given task description.
@@ -69,74 +194,52 @@ class TaskEngine:
         4. Calling the tool via tool_api.
         5. Recording tool performance.
         """
-        print(f"TaskEngine: Attempting to execute task: '{task_description}'")
-        task_log = {"task": task_description, "steps": []}
-
-        # Step 1: Query local Knowledge Base
-        kb_query_prompt = (
-            f"Given the task '{task_description}', is there any relevant information or concept "
-            "in the local knowledge base that could help in understanding or executing this task? "
-            "If yes, provide a concise query for the knowledge base. If no, respond with 'N/A'."
-            "Example: 'Query KB for concepts related to 'reinforcement learning'' or 'N/A'."
-        )
-        kb_query_suggestion = self._call_llm(kb_query_prompt, max_tokens=50)
-        kb_info = ""
-        if kb_query_suggestion and kb_query_suggestion.lower() != 'n/a':
-            print(f"TaskEngine: LLM suggested KB query: '{kb_query_suggestion}'")
-            # For simplicity, we'll just extract the query part. In a real system,
-            # the LLM would output a structured JSON for tool calls.
-            if "query kb for" in kb_query_suggestion.lower():
-                query_text = kb_query_suggestion.lower().split("query kb for", 1)[1].strip().replace("'", "").replace('"', '')
-                if query_text.endswith('.'):
-                    query_text = query_text[:-1]
-                kb_info = self.knowledge_base_manager.query_knowledge_base(query_text)
-                task_log["steps"].append(f"KB Query: '{query_text}' -> Result: {kb_info[:100]}...")
-                print(f"TaskEngine: KB query result: {kb_info[:100]}...")
-            else:
-                print("TaskEngine: LLM's KB query suggestion was not in the expected format.")
-        else:
-            print("TaskEngine: No relevant KB query suggested by LLM.")
-
-        # Step 2: Determine action (tool use or direct response)
-        available_tools = get_available_tools()
-        tool_descriptions = "\n".join([f"- {tool.name}: {tool.description}" for tool in available_tools])
-
-        action_prompt = (
-            f"You are an agent designed to execute tasks. Given the task: '{task_description}'.\n"
-            f"Context from Knowledge Base (if any):\n{kb_info}\n\n"
-            f"Available Tools:\n{tool_descriptions}\n\n"
-            "Based on the task and available tools, decide the best course of action. "
-            "If a tool is suitable, provide a JSON object with 'tool_name' and 'tool_args'. "
-            "Example: {'tool_name': 'search_web', 'tool_args': {'query': 'latest news'}}\n"
-            "If no tool is suitable and you can directly answer or state the next logical step, "
-            "provide a JSON object with 'direct_response' and 'response_content'. "
-            "Example: {'direct_response': 'true', 'response_content': 'I will now proceed to...'}\n"
-            "Ensure your response is a valid JSON object only."
-        )
+        logger.info("TaskEngine: Attempting to execute task: '%s'", task_description)
+
+        # Steps 1 & 2 share one LLM round trip: the model suggests a KB query
+        # and picks an action in a single structured response, halving the
+        # per-task call count and latency.
+        action_prompt = _ACTION_PROMPT_TEMPLATE.format(
+            task_description=task_description, tool_descriptions=_tool_block())
 
-        llm_decision_raw = self._call_llm(action_prompt, model="gpt-4o-mini", max_tokens=200)
-        print(f"TaskEngine: LLM raw decision: {llm_decision_raw}")
+        # JSON mode guarantees well-formed output, so the parse below and the
+        # streaming early-exit in _call_llm never chew on prose preambles.
+        llm_decision_raw = self._call_llm(
+            action_prompt, model="gpt-4o-mini", max_tokens=250, stream=True,
+            response_format={"type": "json_object"})
+        logger.debug("TaskEngine: LLM raw decision: %s", llm_decision_raw)
 
         try:
-            llm_decision = json.loads(llm_decision_raw)
-        except json.JSONDecodeError:
-            print(f"TaskEngine: LLM response was not valid JSON: {llm_decision_raw}")
-            task_log["steps"].append(f"LLM decision invalid JSON: {llm_decision_raw}")
+            llm_response = loads_json(llm_decision_raw)
+        except ValueError:
+            logger.warning("TaskEngine: LLM response was not valid JSON: %s", llm_decision_raw)
             self.memory_manager.record_tool_performance("LLM_decision_parse", False)
             return False, "Failed to parse LLM's action decision."
 
+        kb_info = ""
+        kb_query = llm_response.get("kb_query", "N/A") if isinstance(llm_response, dict) else "N/A"
+        if kb_query and isinstance(kb_query, str) and kb_query.strip().lower() != 'n/a':
+            match = _KB_QUERY_RE.match(kb_query)
+            query_text = match.group("q") if match else kb_query.strip()
+            kb_info = self.knowledge_base_manager.query_knowledge_base(query_text)
+            logger.debug("TaskEngine: KB query '%s' result: %.100s...", query_text, kb_info)
+        else:
+            logger.debug("TaskEngine: No relevant KB query suggested by LLM.")
+
+        llm_decision = llm_response.get("decision", {}) if isinstance(llm_response, dict) else {}
+        if not isinstance(llm_decision, dict):
+            llm_decision = {}
+
         if "direct_response" in llm_decision and llm_decision.get("direct_response") == "true":
             response_content = llm_decision.get("response_content", "No specific content provided.")
-            print(f"TaskEngine: LLM decided on direct response: {response_content}")
-            task_log["steps"].append(f"Direct Response: {response_content}")
+            logger.info("TaskEngine: LLM decided on direct response: %s", response_content)
             self.memory_manager.record_tool_performance("LLM_direct_response", True)
             self.memory_manager.add_log_entry(f"Task '{task_description}' completed directly: {response_content}")
             return True, response_content
         elif "tool_name" in llm_decision and "tool_args" in llm_decision:
             tool_name = llm_decision["tool_name"]
             tool_args = llm_decision["tool_args"]
-            print(f"TaskEngine: LLM decided to use tool '{tool_name}' with args: {tool_args}")
-            task_log["steps"].append(f"Tool Call: {tool_name} with args {tool_args}")
+            logger.info("TaskEngine: LLM decided to use tool '%s' with args: %s", tool_name, tool_args)
 
             # Step 3 & 4: Call the tool
             tool_success = False
@@ -144,12 +247,10 @@ class TaskEngine:
             try:
                 tool_output = call_tool(tool_name, **tool_args)
                 tool_success = True
-                print(f"TaskEngine: Tool '{tool_name}' executed successfully. Output: {tool_output[:100]}...")
-                task_log["steps"].append(f"Tool Output: {tool_output[:100]}...")
+                logger.info("TaskEngine: Tool '%s' executed successfully. Output: %.100s...", tool_name, tool_output)
             except Exception as e:
                 tool_output = f"Error calling tool '{tool_name}': {e}"
-                print(f"TaskEngine: {tool_output}")
-                task_log["steps"].append(f"Tool Error: {tool_output}")
+                logger.error("TaskEngine: %s", tool_output)
 
             # Step 5: Record tool performance
             self.memory_manager.record_tool_performance(tool_name, tool_success)
@@ -157,8 +258,7 @@ class TaskEngine:
 
             return tool_success, tool_output
         else:
-            print(f"TaskEngine: LLM's decision was neither direct response nor tool call: {llm_decision_raw}")
-            task_log["steps"].append(f"LLM decision unclear: {llm_decision_raw}")
+            logger.warning("TaskEngine: LLM's decision was neither direct response nor tool call: %s", llm_decision_raw)
             self.memory_manager.record_tool_performance("LLM_decision_unclear", False)
             return False, "LLM could not determine a clear action."
 
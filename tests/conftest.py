@@ -0,0 +1,99 @@
+# tests/conftest.py
+# Shared fixtures: a deterministic clock so no test ever really sleeps
+# or depends on wall-clock time.
+
+import datetime as _datetime_module
+import os
+import sys
+import time as _time_module
+
+import pytest
+
+# Make the project modules (and this conftest's helpers) importable
+# regardless of where pytest is invoked.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+_REAL_DATETIME = _datetime_module.datetime
+
+
+class FakeCompletionStream:
+    """
+    Iterable stand-in for a streamed chat completion: yields one chunk
+    carrying the full content and provides the close() the streaming
+    early-exit path calls. Reusable across calls (each iteration starts
+    fresh), so it can serve as a mock's return_value.
+    """
+
+    def __init__(self, content: str):
+        from unittest.mock import Mock
+        self._chunks = [Mock(choices=[Mock(delta=Mock(content=content))])]
+
+    def __iter__(self):
+        return iter(self._chunks)
+
+    def close(self):
+        pass
+
+# Modules that bound the datetime class at import time via
+# 'from datetime import datetime'. Freezing must patch each bound name;
+# replacing the stdlib attribute would miss all of them.
+_DATETIME_CONSUMERS = (
+    "memory_manager.datetime",
+    "obedience_logic.datetime",
+    "worker_mind.datetime",
+)
+
+
+class FakeClock:
+    """
+    Deterministic stand-in for the clocks the components actually read:
+    time.time(), time.monotonic(), and the per-module 'datetime' names.
+    All three start frozen and move together via advance(); everything
+    else (fromisoformat, fromtimestamp, construction, ...) delegates to
+    the real datetime class.
+    """
+
+    def __init__(self):
+        self._now = _REAL_DATETIME(2023, 1, 1, 12, 0, 0)
+        self._epoch = self._now.timestamp()
+        # Arbitrary nonzero start so deltas against 0.0 sentinels are large.
+        self._monotonic = 1000.0
+
+    def advance(self, seconds: float):
+        """Moves all fake clocks forward by the given number of seconds."""
+        self._now += _datetime_module.timedelta(seconds=seconds)
+        self._epoch += seconds
+        self._monotonic += seconds
+
+    def now(self, tz=None):
+        return self._now
+
+    def time(self) -> float:
+        return self._epoch
+
+    def monotonic(self) -> float:
+        return self._monotonic
+
+    def __call__(self, *args, **kwargs):
+        return _REAL_DATETIME(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(_REAL_DATETIME, name)
+
+
+@pytest.fixture(autouse=True)
+def _fast_clock(monkeypatch):
+    """
+    Neutralizes real-time costs for every test: time.sleep becomes a
+    no-op and time.time()/time.monotonic()/datetime.now() are frozen.
+    Tests that exercise decay or TTLs request this fixture by name and
+    call .advance(seconds).
+    """
+    fake = FakeClock()
+    monkeypatch.setattr(_time_module, "sleep", lambda *_: None)
+    monkeypatch.setattr(_time_module, "time", fake.time)
+    monkeypatch.setattr(_time_module, "monotonic", fake.monotonic)
+    for bound_name in _DATETIME_CONSUMERS:
+        monkeypatch.setattr(bound_name, fake)
+    yield fake
@@ -1,107 +1,148 @@
 # tests/test_agents.py
-# Unit and integration tests for the agents module (TaskExecutionEngine).
+# Unit and integration tests for the task execution engine.
 
 import pytest
 import os
 import json
 from unittest.mock import Mock, patch
 
-# Adjust path to import modules from src/
+# Adjust path to import modules from the project root
 import sys
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from agents.TaskExecutionEngine import TaskEngine
-from memory.AgentMemoryManager import MemoryManager
-from knowledge_base.LocalKnowledgeBaseManager import KnowledgeBaseManager
-from tools.AgentToolsDefinition import get_tool_by_name # To verify tool calls
-from tools.ToolInvocationInterface import call_tool # To mock tool calls
+from task_engine import TaskEngine
+from memory_manager import MemoryManager
+from knowledge_base_manager import KnowledgeBaseManager
+from conftest import FakeCompletionStream
+from llm_client import set_shared_client
 
-# Mocking external dependencies like OpenAI API calls
-@pytest.fixture(autouse=True)
+
+def _merged_response(kb_query, decision):
+    """The engine's single structured response: KB query + action decision."""
+    return FakeCompletionStream(json.dumps({"kb_query": kb_query, "decision": decision}))
+
+_DEFAULT_DECISION = _merged_response(
+    "N/A", {"direct_response": "true", "response_content": "Default direct response."})
+
+# Mocking external dependencies like OpenAI API calls.
+# Module scope so the shared-client seam is populated before the
+# module-scoped engine stack below constructs itself; the autouse reset
+# restores the default response and call history around every test.
+@pytest.fixture(scope="module")
 def mock_llm_client():
     """Mocks the OpenAI client for all LLM calls."""
     with patch('openai.OpenAI') as mock_openai:
         mock_instance = mock_openai.return_value
-        # Default mock response for LLM decision
-        mock_instance.chat.completions.create.return_value = Mock(
-            choices=[Mock(message=Mock(content='{"direct_response": "true", "response_content": "Default direct response."}'))]
-        )
+        # The engine streams its decision call, so the default response is a
+        # fake stream rather than a plain message Mock.
+        mock_instance.chat.completions.create.return_value = _DEFAULT_DECISION
+        # Zero vector: cosine similarity against it is defined as 0.0, so
+        # the semantic cache tier stays inert under test.
+        mock_instance.embeddings.create.return_value = Mock(data=[Mock(embedding=[0.0])])
+        # Install the mock as the process-wide shared client so components
+        # built while it is active never construct (or reuse) a real one.
+        set_shared_client(mock_instance)
         yield mock_instance
+        set_shared_client(None)
 
-# Fixtures for component instances
-@pytest.fixture
-def memory_manager_fixture():
-    # Use temporary files for testing to avoid polluting real data
-    temp_memory_file = "test_task_engine_memory.json"
-    temp_tool_perf_file = "test_task_engine_tool_performance.json"
-    if os.path.exists(temp_memory_file): os.remove(temp_memory_file)
-    if os.path.exists(temp_tool_perf_file): os.remove(temp_tool_perf_file)
-
-    mm = MemoryManager(memory_file=temp_memory_file, tool_performance_file=temp_tool_perf_file)
+@pytest.fixture(autouse=True)
+def _reset_llm_mock(mock_llm_client):
+    """Restores the default response and clears call history per test."""
+    mock_llm_client.chat.completions.create.side_effect = None
+    mock_llm_client.chat.completions.create.return_value = _DEFAULT_DECISION
+    mock_llm_client.chat.completions.create.reset_mock()
+    yield
+
+# Fixtures for component instances.
+# Construction opens files and re-mocks the OpenAI client, so the engine
+# stack is built once per module and wiped between tests instead.
+@pytest.fixture(scope="module")
+def memory_manager_fixture(tmp_path_factory, mock_llm_client):
+    # pytest-managed temp dir: no CWD pollution, no manual cleanup, and no
+    # shared-file races under parallel (pytest-xdist) runs.
+    state_dir = tmp_path_factory.mktemp("task_engine_state")
+    mm = MemoryManager(memory_file=str(state_dir / "memory.json"),
+                       tool_performance_file=str(state_dir / "tool_performance.json"))
     yield mm
-    if os.path.exists(temp_memory_file): os.remove(temp_memory_file)
-    if os.path.exists(temp_tool_perf_file): os.remove(temp_tool_perf_file)
-
-@pytest.fixture
-def knowledge_base_manager_fixture():
-    temp_kb_file = "test_task_engine_aac_theory_pack.json"
-    if os.path.exists(temp_kb_file): os.remove(temp_kb_file)
-    kbm = KnowledgeBaseManager(kb_file=temp_kb_file)
+
+@pytest.fixture(scope="module")
+def knowledge_base_manager_fixture(tmp_path_factory, mock_llm_client):
+    kb_dir = tmp_path_factory.mktemp("task_engine_kb")
+    kbm = KnowledgeBaseManager(kb_file=str(kb_dir / "aac_theory_pack.json"))
     yield kbm
-    if os.path.exists(temp_kb_file): os.remove(temp_kb_file)
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def task_engine_fixture(memory_manager_fixture, knowledge_base_manager_fixture):
     te = TaskEngine(memory_manager_fixture, knowledge_base_manager_fixture)
     yield te
 
-# --- Tests for TaskExecutionEngine ---
+@pytest.fixture(autouse=True)
+def _reset_shared_state(memory_manager_fixture, knowledge_base_manager_fixture,
+                        task_engine_fixture, mock_llm_client):
+    """Wipes the module-scoped components' in-memory state between tests."""
+    yield
+    memory_manager_fixture.memory["daily_logs"].clear()
+    memory_manager_fixture.memory["reflections"].clear()
+    memory_manager_fixture.tool_performance_data["tool_usage"].clear()
+    memory_manager_fixture.tool_performance_data["tool_success"].clear()
+    knowledge_base_manager_fixture.knowledge_base.get("concepts", []).clear()
+    knowledge_base_manager_fixture.knowledge_base.get("rules", []).clear()
+    # Clearing the lists in place desyncs the derived structures, so restore
+    # the managers' own invariants: rebuild the token index (stale postings
+    # would index into the now-empty lists) and invalidate the timestamp
+    # list and serialized-fragment caches via their version counter.
+    knowledge_base_manager_fixture._build_index()
+    knowledge_base_manager_fixture._kb_version += 1
+    memory_manager_fixture._log_timestamps = None
+    memory_manager_fixture._log_version += 1
+    # Undo per-test engine mutations (e.g. llm_client = None) and drop any
+    # cached decisions so no response leaks into a later test's call count.
+    task_engine_fixture.llm_client = mock_llm_client
+    if task_engine_fixture.response_cache:
+        task_engine_fixture.response_cache.clear()
+
+# --- Tests for TaskEngine ---
 
 def test_task_engine_direct_response(task_engine_fixture, mock_llm_client):
     task_description = "Summarize the concept of reinforcement."
     # Configure mock LLM to return a direct response
-    mock_llm_client.chat.completions.create.side_effect = [
-        Mock(choices=[Mock(message=Mock(content='N/A'))]), # For KB query
-        Mock(choices=[Mock(message=Mock(content='{"direct_response": "true", "response_content": "Reinforcement increases behavior."}'))]) # For action decision
-    ]
+    mock_llm_client.chat.completions.create.return_value = _merged_response(
+        "N/A", {"direct_response": "true", "response_content": "Reinforcement increases behavior."})
 
     success, output = task_engine_fixture.execute_task(task_description)
 
     assert success is True
     assert "Reinforcement increases behavior." in output
-    # Verify LLM was called for KB query and action decision
-    assert mock_llm_client.chat.completions.create.call_count == 2
+    # KB query and action decision share a single merged LLM round trip
+    assert mock_llm_client.chat.completions.create.call_count == 1
     # Verify tool performance was recorded for direct response
     tool_perf = task_engine_fixture.memory_manager.get_tool_performance_data()
     assert tool_perf['tool_usage'].get('LLM_direct_response', 0) == 1
     assert tool_perf['tool_success'].get('LLM_direct_response', 0) == 1
 
-@patch('tools.ToolInvocationInterface.call_tool') # Mock the actual tool call
+@patch('task_engine.call_tool') # Mock the actual tool call
 def test_task_engine_tool_use_success(mock_call_tool, task_engine_fixture, mock_llm_client):
     task_description = "Search for 'latest AI breakthroughs'."
-    mock_llm_client.chat.completions.create.side_effect = [
-        Mock(choices=[Mock(message=Mock(content='N/A'))]), # For KB query
-        Mock(choices=[Mock(message=Mock(content='{"tool_name": "search_web", "tool_args": {"query": "latest AI breakthroughs"}}'))]) # For action decision
-    ]
+    mock_llm_client.chat.completions.create.return_value = _merged_response(
+        "N/A", {"tool_name": "search_web", "tool_args": {"query": "latest AI breakthroughs"}})
     mock_call_tool.return_value = "AI breakthroughs are happening daily."
 
     success, output = task_engine_fixture.execute_task(task_description)
 
     assert success is True
     assert "AI breakthroughs are happening daily." in output
+    assert mock_llm_client.chat.completions.create.call_count == 1
     mock_call_tool.assert_called_once_with("search_web", query="latest AI breakthroughs")
     # Verify tool performance was recorded for search_web
     tool_perf = task_engine_fixture.memory_manager.get_tool_performance_data()
     assert tool_perf['tool_usage'].get('search_web', 0) == 1
     assert tool_perf['tool_success'].get('search_web', 0) == 1
 
-@patch('tools.ToolInvocationInterface.call_tool')
+@patch('task_engine.call_tool')
 def test_task_engine_tool_use_failure(mock_call_tool, task_engine_fixture, mock_llm_client):
     task_description = "Write a file named 'error_log.txt'."
-    mock_llm_client.chat.completions.create.side_effect = [
-        Mock(choices=[Mock(message=Mock(content='N/A'))]), # For KB query
-        Mock(choices=[Mock(message=Mock(content='{"tool_name": "write_file", "tool_args": {"filename": "error_log.txt", "content": "Error details"}}'))]) # For action decision
-    ]
+    mock_llm_client.chat.completions.create.return_value = _merged_response(
+        "N/A", {"tool_name": "write_file", "tool_args": {"filename": "error_log.txt", "content": "Error details"}})
     mock_call_tool.side_effect = Exception("Disk full error") # Simulate tool failure
 
     success, output = task_engine_fixture.execute_task(task_description)
@@ -116,10 +157,7 @@ def test_task_engine_tool_use_failure(mock_call_tool, task_engine_fixture, mock_
 
 def test_task_engine_invalid_llm_decision_json(task_engine_fixture, mock_llm_client):
     task_description = "Do something ambiguous."
-    mock_llm_client.chat.completions.create.side_effect = [
-        Mock(choices=[Mock(message=Mock(content='N/A'))]), # For KB query
-        Mock(choices=[Mock(message=Mock(content='This is not valid JSON.'))]) # Invalid JSON
-    ]
+    mock_llm_client.chat.completions.create.return_value = FakeCompletionStream('This is not valid JSON.')
 
     success, output = task_engine_fixture.execute_task(task_description)
 
@@ -134,23 +172,25 @@ def test_task_engine_kb_query_integration(task_engine_fixture, knowledge_base_ma
     # Add a concept to KB for testing
     knowledge_base_manager_fixture.add_concept("c1", "Reinforcement", "A process that strengthens a behavior.")
 
-    mock_llm_client.chat.completions.create.side_effect = [
-        Mock(choices=[Mock(message=Mock(content="Query KB for concepts related to 'reinforcement'"))]), # For KB query
-        Mock(choices=[Mock(message=Mock(content='{"direct_response": "true", "response_content": "Reinforcement strengthens behavior."}'))]) # For action decision
-    ]
+    # The merged response suggests a KB query (in the legacy phrasing, which
+    # the engine normalizes) alongside the direct-response decision.
+    mock_llm_client.chat.completions.create.return_value = _merged_response(
+        "Query KB for 'reinforcement'",
+        {"direct_response": "true", "response_content": "Reinforcement strengthens behavior."})
 
     success, output = task_engine_fixture.execute_task(task_description)
 
     assert success is True
     assert "Reinforcement strengthens behavior." in output
-    # Verify LLM was called for KB query and action decision
-    assert mock_llm_client.chat.completions.create.call_count == 2
-    # You might want to inspect the prompt sent to the second LLM call
-    # to ensure it included the KB info, but that's harder with side_effect.
-    # For now, successful execution implies the flow.
+    # The KB query rode along in the single decision round trip
+    assert mock_llm_client.chat.completions.create.call_count == 1
+    # The suggested query actually resolves against the seeded KB
+    assert "strengthens a behavior" in knowledge_base_manager_fixture.query_knowledge_base("reinforcement")
 
 def test_task_engine_no_llm_client(task_engine_fixture):
     task_engine_fixture.llm_client = None # Simulate no LLM client
     success, output = task_engine_fixture.execute_task("Do something.")
     assert success is False
-    assert "LLM client not configured." in output
+    # The merged decision call yields an error string, which then fails the
+    # decision parse
+    assert "Failed to parse LLM's action decision." in output
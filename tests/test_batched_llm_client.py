@@ -0,0 +1,98 @@
+# tests/test_batched_llm_client.py
+# Unit tests for the Batch API request buffer.
+
+import json
+import os
+from unittest.mock import Mock
+
+# Adjust path to import modules from the project root
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from batched_llm_client import BatchedLLMClient
+
+
+def _batch_backend(drop_results=0, status="completed"):
+    """
+    Mock OpenAI client implementing the batch round trip: records the
+    custom_ids from the uploaded JSONL and serves an output file answering
+    each of them (minus the last 'drop_results', to simulate missing rows).
+    """
+    client = Mock()
+    uploaded = {"ids": []}
+
+    def _files_create(file, purpose):
+        lines = file.read().decode("utf-8").splitlines()
+        uploaded["ids"] = [json.loads(line)["custom_id"] for line in lines]
+        return Mock(id="file-1")
+
+    def _files_content(file_id):
+        answered = uploaded["ids"][:len(uploaded["ids"]) - drop_results or None]
+        lines = [
+            json.dumps({
+                "custom_id": custom_id,
+                "response": {"body": {"choices": [{"message": {"content": f"reply for {custom_id}"}}]}},
+            })
+            for custom_id in answered
+        ]
+        return Mock(text="\n".join(lines))
+
+    client.files.create.side_effect = _files_create
+    client.batches.create.return_value = Mock(id="batch-1")
+    client.batches.retrieve.return_value = Mock(status=status, output_file_id="out-1")
+    client.files.content.side_effect = _files_content
+    return client
+
+
+def _make_client(backend, **kwargs):
+    # Long max_wait so the debounce timer never fires mid-test; short poll
+    # interval so completed batches resolve immediately.
+    kwargs.setdefault("max_wait_seconds", 60.0)
+    kwargs.setdefault("poll_interval_seconds", 0.01)
+    return BatchedLLMClient(backend, **kwargs)
+
+
+def test_flush_submits_buffer_and_resolves_futures():
+    backend = _batch_backend()
+    batched = _make_client(backend, max_batch_size=10)
+
+    first = batched.submit("prompt one")
+    second = batched.submit("prompt two")
+    backend.files.create.assert_not_called() # Still buffered
+    batched.flush()
+
+    assert first.result(timeout=5).startswith("reply for req-")
+    assert second.result(timeout=5).startswith("reply for req-")
+    # Both requests shared one upload and one batch submission.
+    backend.files.create.assert_called_once()
+    backend.batches.create.assert_called_once()
+
+def test_full_buffer_flushes_without_explicit_flush():
+    batched = _make_client(_batch_backend(), max_batch_size=2)
+
+    first = batched.submit("one")
+    second = batched.submit("two")
+
+    assert first.result(timeout=5).startswith("reply for req-")
+    assert second.result(timeout=5).startswith("reply for req-")
+
+def test_missing_output_row_resolves_to_an_error():
+    batched = _make_client(_batch_backend(drop_results=1), max_batch_size=2)
+
+    futures = [batched.submit("one"), batched.submit("two")]
+    results = [future.result(timeout=5) for future in futures]
+
+    assert sum(result.startswith("reply for req-") for result in results) == 1
+    assert any("No result returned" in result for result in results)
+
+def test_failed_batch_resolves_all_futures_with_an_error():
+    batched = _make_client(_batch_backend(status="failed"), max_batch_size=1)
+
+    result = batched.submit("one").result(timeout=5)
+
+    assert result.startswith("Error:")
+    assert "failed" in result
+
+def test_no_client_resolves_immediately_with_error():
+    batched = BatchedLLMClient(None)
+    assert batched.submit("x").result(timeout=1) == "Error: LLM client not configured."
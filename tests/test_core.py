@@ -5,96 +5,173 @@ import pytest
 import os
 import json
 from unittest.mock import Mock, patch
-from datetime import datetime, timedelta
 
-# Adjust path to import modules from src/
+# Adjust path to import modules from the project root
 import sys
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
-
-from core.WorkerMindOrchestrator import WorkerMind
-from core.ObedienceModule import ObedienceLogic
-from core.AutonomousPlanner import AutonomousPlanner
-from agents.TaskExecutionEngine import TaskEngine
-from memory.AgentMemoryManager import MemoryManager
-from knowledge_base.LocalKnowledgeBaseManager import KnowledgeBaseManager
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from worker_mind import WorkerMind
+from obedience_logic import ObedienceLogic
+from autonomous_planner import AutonomousPlanner
+from task_engine import TaskEngine
+from memory_manager import MemoryManager
+from knowledge_base_manager import KnowledgeBaseManager
 from config import AppConfig
-
-# Mocking external dependencies like OpenAI API calls
-@pytest.fixture(autouse=True)
+from conftest import FakeCompletionStream
+from llm_client import set_shared_client
+
+# Canned LLM responses keyed by a marker substring of the call's messages.
+# The markers live in the components' system prompts, so routing scans the
+# full message list, not just the final user message.
+_DEFAULT_ROUTES = {
+    # memory_manager.REFLECTION_SYSTEM_PROMPT
+    "reflecting on your past performance": "Mocked reflection insight.",
+    # autonomous_planner.PLANNING_SYSTEM_PROMPT
+    "strategic planner": json.dumps({
+        "plan": "Test Plan",
+        "goals": [{"id": "g1", "depends_on": [], "description": "Test Goal", "status": "pending"}],
+    }),
+    # task_engine's action prompt (merged KB-query + decision call)
+    "agent designed to execute tasks": json.dumps({
+        "kb_query": "N/A",
+        "decision": {"direct_response": "true", "response_content": "Task completed directly."},
+    }),
+}
+_DEFAULT_CONTENT = 'N/A'
+
+
+def _llm_router(overrides=None):
+    """
+    Builds a side_effect for chat.completions.create that answers each call
+    from the routing table, wrapping the content in a fake stream when the
+    caller asked for stream=True. Per-test 'overrides' replace the canned
+    content for individual markers.
+    """
+    routes = dict(_DEFAULT_ROUTES)
+    if overrides:
+        routes.update(overrides)
+
+    def _route(*args, **kwargs):
+        messages = kwargs.get("messages") or (args[0] if args else [])
+        text = "\n".join(message.get("content", "") for message in messages)
+        content = _DEFAULT_CONTENT
+        for marker, canned in routes.items():
+            if marker in text:
+                content = canned
+                break
+        if kwargs.get("stream"):
+            return FakeCompletionStream(content)
+        return Mock(choices=[Mock(message=Mock(content=content))])
+
+    return _route
+
+
+def _called_with_marker(mock_client, marker: str) -> bool:
+    """True when any create() call carried the marker in its messages."""
+    for call in mock_client.chat.completions.create.call_args_list:
+        messages = call.kwargs.get("messages") or (call.args[0] if call.args else [])
+        if any(marker in message.get("content", "") for message in messages):
+            return True
+    return False
+
+
+# Mocking external dependencies like OpenAI API calls.
+# Module scope so the shared-client seam is already populated when the
+# module-scoped component fixtures below construct themselves; the autouse
+# reset restores routing and call history around every test.
+@pytest.fixture(scope="module")
 def mock_llm_client():
     """Mocks the OpenAI client for all LLM calls."""
     with patch('openai.OpenAI') as mock_openai:
         mock_instance = mock_openai.return_value
-        mock_instance.chat.completions.create.return_value = Mock(
-            choices=[Mock(message=Mock(content='{"plan": "Test Plan", "goals": [{"description": "Test Goal", "status": "pending"}]}'
-                                              if 'plan' in Mock.call_args.args[0] else
-                                              '{"direct_response": "true", "response_content": "Task completed directly."}'
-                                              if 'direct_response' in Mock.call_args.args[0] else
-                                              '{"tool_name": "search_web", "tool_args": {"query": "test"}}'
-                                              if 'tool_name' in Mock.call_args.args[0] else
-                                              'N/A'
-                                             ))]
-        )
+        mock_instance.chat.completions.create.side_effect = _llm_router()
+        # Zero vector: cosine similarity against it is defined as 0.0, so
+        # the semantic cache tier stays inert under test.
+        mock_instance.embeddings.create.return_value = Mock(data=[Mock(embedding=[0.0])])
+        # Install the mock as the process-wide shared client so components
+        # built while it is active never construct (or reuse) a real one.
+        set_shared_client(mock_instance)
         yield mock_instance
+        set_shared_client(None)
 
-# Fixtures for component instances
-@pytest.fixture
-def memory_manager_fixture():
-    # Use temporary files for testing to avoid polluting real data
-    temp_memory_file = "test_worker_mind_memory.json"
-    temp_tool_perf_file = "test_tool_performance_data.json"
-    if os.path.exists(temp_memory_file): os.remove(temp_memory_file)
-    if os.path.exists(temp_tool_perf_file): os.remove(temp_tool_perf_file)
-
-    mm = MemoryManager(memory_file=temp_memory_file, tool_performance_file=temp_tool_perf_file)
+@pytest.fixture(autouse=True)
+def _reset_llm_mock(mock_llm_client):
+    """Restores default routing and clears call history for every test."""
+    mock_llm_client.chat.completions.create.side_effect = _llm_router()
+    mock_llm_client.chat.completions.create.reset_mock()
+    yield
+
+# Fixtures for component instances.
+# The memory/KB/task-engine stack is expensive to construct (file opens,
+# client mocking), so it is shared per module; the autouse reset below
+# wipes in-memory state between tests. Fixtures whose tests mutate
+# persistent levels (obedience, worker mind) stay function-scoped.
+@pytest.fixture(scope="module")
+def memory_manager_fixture(tmp_path_factory, mock_llm_client):
+    # pytest-managed temp dir: no CWD pollution, no manual cleanup, and no
+    # shared-file races under parallel (pytest-xdist) runs.
+    state_dir = tmp_path_factory.mktemp("core_state")
+    mm = MemoryManager(memory_file=str(state_dir / "memory.json"),
+                       tool_performance_file=str(state_dir / "tool_performance.json"))
     yield mm
-    if os.path.exists(temp_memory_file): os.remove(temp_memory_file)
-    if os.path.exists(temp_tool_perf_file): os.remove(temp_tool_perf_file)
 
 @pytest.fixture
-def obedience_logic_fixture():
-    temp_state_file = "test_worker_mind_state.json"
-    if os.path.exists(temp_state_file): os.remove(temp_state_file)
-    ol = ObedienceLogic(state_file=temp_state_file)
+def obedience_logic_fixture(tmp_path):
+    ol = ObedienceLogic(state_file=str(tmp_path / "worker_mind_state.json"))
     yield ol
-    if os.path.exists(temp_state_file): os.remove(temp_state_file)
 
-@pytest.fixture
-def knowledge_base_manager_fixture():
-    temp_kb_file = "test_aac_theory_pack.json"
-    if os.path.exists(temp_kb_file): os.remove(temp_kb_file)
-    kbm = KnowledgeBaseManager(kb_file=temp_kb_file)
+@pytest.fixture(scope="module")
+def knowledge_base_manager_fixture(tmp_path_factory, mock_llm_client):
+    kb_dir = tmp_path_factory.mktemp("core_kb")
+    kbm = KnowledgeBaseManager(kb_file=str(kb_dir / "aac_theory_pack.json"))
     yield kbm
-    if os.path.exists(temp_kb_file): os.remove(temp_kb_file)
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def task_engine_fixture(memory_manager_fixture, knowledge_base_manager_fixture):
     te = TaskEngine(memory_manager_fixture, knowledge_base_manager_fixture)
     yield te
 
+@pytest.fixture(autouse=True)
+def _reset_shared_state(memory_manager_fixture, knowledge_base_manager_fixture,
+                        task_engine_fixture, mock_llm_client):
+    """Wipes the module-scoped components' in-memory state between tests."""
+    yield
+    memory_manager_fixture.memory["daily_logs"].clear()
+    memory_manager_fixture.memory["reflections"].clear()
+    memory_manager_fixture.tool_performance_data["tool_usage"].clear()
+    memory_manager_fixture.tool_performance_data["tool_success"].clear()
+    knowledge_base_manager_fixture.knowledge_base.get("concepts", []).clear()
+    knowledge_base_manager_fixture.knowledge_base.get("rules", []).clear()
+    # Clearing the lists in place desyncs the derived structures, so restore
+    # the managers' own invariants: rebuild the token index (stale postings
+    # would index into the now-empty lists) and invalidate the timestamp
+    # list and serialized-fragment caches via their version counter.
+    knowledge_base_manager_fixture._build_index()
+    knowledge_base_manager_fixture._kb_version += 1
+    memory_manager_fixture._log_timestamps = None
+    memory_manager_fixture._log_version += 1
+    # Undo per-test engine mutations and drop any cached decisions so no
+    # response leaks into a later test's call count.
+    task_engine_fixture.llm_client = mock_llm_client
+    if task_engine_fixture.response_cache:
+        task_engine_fixture.response_cache.clear()
+
 @pytest.fixture
 def autonomous_planner_fixture(memory_manager_fixture):
     ap = AutonomousPlanner(memory_manager_fixture)
     yield ap
 
 @pytest.fixture
-def worker_mind_fixture(memory_manager_fixture, obedience_logic_fixture, autonomous_planner_fixture, task_engine_fixture):
-    temp_last_proposal = "test_last_proposal.json"
-    temp_last_orders = "test_last_orders.json"
-    if os.path.exists(temp_last_proposal): os.remove(temp_last_proposal)
-    if os.path.exists(temp_last_orders): os.remove(temp_last_orders)
-
-    # Patch file paths in AppConfig for testing
-    with patch.object(AppConfig, 'LAST_PROPOSAL_FILE', temp_last_proposal), \
-         patch.object(AppConfig, 'LAST_ORDERS_FILE', temp_last_orders):
+def worker_mind_fixture(tmp_path, memory_manager_fixture, obedience_logic_fixture, autonomous_planner_fixture, task_engine_fixture):
+    # Patch file paths in AppConfig for testing; tests read the patched
+    # AppConfig attributes rather than hard-coding filenames.
+    with patch.object(AppConfig, 'LAST_PROPOSAL_FILE', str(tmp_path / "last_proposal.json")), \
+         patch.object(AppConfig, 'LAST_ORDERS_FILE', str(tmp_path / "last_orders.json")):
         wm = WorkerMind(memory_manager_fixture, obedience_logic_fixture, autonomous_planner_fixture, task_engine_fixture)
         yield wm
 
-    if os.path.exists(temp_last_proposal): os.remove(temp_last_proposal)
-    if os.path.exists(temp_last_orders): os.remove(temp_last_orders)
-
 
-# --- Tests for WorkerMindOrchestrator ---
+# --- Tests for WorkerMind ---
 
 def test_worker_mind_initialization(worker_mind_fixture):
     assert worker_mind_fixture.current_plan is None
@@ -105,21 +182,25 @@ def test_worker_mind_receive_manual_orders(worker_mind_fixture):
     orders = "Perform a quick web search for 'AI news'."
     worker_mind_fixture.receive_manual_orders(orders)
     assert worker_mind_fixture.manual_orders == orders
-    # Check if orders are saved to file
-    with open("test_last_orders.json", 'r') as f:
+    # Receipt only marks the orders dirty; force the debounced flush so the
+    # file exists before reading it back.
+    worker_mind_fixture.flush_state()
+    with open(AppConfig.LAST_ORDERS_FILE, 'r') as f:
         data = json.load(f)
         assert data['orders'] == orders
 
-@patch('time.sleep', return_value=None) # Mock time.sleep to speed up tests
-def test_worker_mind_run_cycle_manual_orders(mock_sleep, worker_mind_fixture, mock_llm_client):
+def test_worker_mind_run_cycle_manual_orders(worker_mind_fixture, mock_llm_client):
     orders = "Test manual order execution."
     worker_mind_fixture.receive_manual_orders(orders)
 
-    # Ensure LLM returns a valid plan for manual orders
-    mock_llm_client.chat.completions.create.return_value = Mock(
-        choices=[Mock(message=Mock(content='{"plan": "Fulfill manual order: Test manual order execution.", "goals": [{"description": "Test manual order execution.", "status": "pending"}]}'
-                                     ))]
-    )
+    # Planning always runs and overwrites the current plan, so have the
+    # planner echo a plan derived from the manual orders for this cycle.
+    mock_llm_client.chat.completions.create.side_effect = _llm_router({
+        "strategic planner": json.dumps({
+            "plan": f"Fulfill manual order: {orders}",
+            "goals": [{"id": "g1", "depends_on": [], "description": orders, "status": "pending"}],
+        }),
+    })
 
     worker_mind_fixture.run_cycle()
 
@@ -130,44 +211,44 @@ def test_worker_mind_run_cycle_manual_orders(mock_sleep, worker_mind_fixture, mo
 
     # Verify reflection was called
     mock_llm_client.chat.completions.create.assert_called()
-    assert any("reflection" in call.args[0] for call in mock_llm_client.chat.completions.create.call_args_list)
+    assert _called_with_marker(mock_llm_client, "reflecting on your past performance")
 
     # Verify planning was called
-    assert any("plan" in call.args[0] for call in mock_llm_client.chat.completions.create.call_args_list)
+    assert _called_with_marker(mock_llm_client, "strategic planner")
 
-    # Verify daily log was updated
+    # Verify daily log was updated; activities are (event, payload) tuples
     memory_dump = worker_mind_fixture.memory_manager.get_full_memory_dump()
     assert len(memory_dump['daily_logs']) > 0
-    assert any("Received manual orders" in activity for activity in memory_dump['daily_logs'][-1]['activities'])
+    activities = memory_dump['daily_logs'][-1]['activities']
+    assert any(event == "manual_orders_received" and payload.get("orders") == orders
+               for event, payload in activities)
 
-@patch('time.sleep', return_value=None)
-def test_worker_mind_run_cycle_autonomous(mock_sleep, worker_mind_fixture, mock_llm_client):
+def test_worker_mind_run_cycle_autonomous(worker_mind_fixture, mock_llm_client):
     # Reset manual orders for autonomous test
     worker_mind_fixture.manual_orders = None
-    if os.path.exists("test_last_orders.json"): os.remove("test_last_orders.json")
-
-    # Ensure LLM returns a valid plan for autonomous operation
-    mock_llm_client.chat.completions.create.side_effect = [
-        Mock(choices=[Mock(message=Mock(content='{"reflection": "Good job overall."}'))]), # For reflection
-        Mock(choices=[Mock(message=Mock(content='{"plan": "Autonomous Plan", "goals": [{"description": "Autonomous Goal", "status": "pending"}]}')), # For planning
-        Mock(choices=[Mock(message=Mock(content='{"direct_response": "true", "response_content": "Autonomous task completed."}')), # For task execution
-    ]
+    if os.path.exists(AppConfig.LAST_ORDERS_FILE): os.remove(AppConfig.LAST_ORDERS_FILE)
 
+    # Default routing: reflection insight, "Test Plan" with one goal, and a
+    # direct-response task execution.
     worker_mind_fixture.run_cycle()
 
     assert worker_mind_fixture.manual_orders is None
-    assert "Autonomous Plan" in worker_mind_fixture.current_plan
+    assert "Test Plan" in worker_mind_fixture.current_plan
     assert len(worker_mind_fixture.current_goals) == 1
     assert worker_mind_fixture.current_goals[0]['status'] == 'achieved'
 
     # Verify reflection and planning were called
     assert mock_llm_client.chat.completions.create.call_count >= 2
+    assert _called_with_marker(mock_llm_client, "reflecting on your past performance")
+    assert _called_with_marker(mock_llm_client, "strategic planner")
 
     memory_dump = worker_mind_fixture.memory_manager.get_full_memory_dump()
     assert len(memory_dump['daily_logs']) > 0
-    assert any("Executing plan: 'Autonomous Plan'" in activity for activity in memory_dump['daily_logs'][-1]['activities'])
+    activities = memory_dump['daily_logs'][-1]['activities']
+    assert any(event == "plan_execution_started" and payload.get("plan") == "Test Plan"
+               for event, payload in activities)
 
-# --- Tests for ObedienceModule ---
+# --- Tests for ObedienceLogic ---
 
 def test_obedience_logic_initial_levels(obedience_logic_fixture):
     assert obedience_logic_fixture.joy_level == 0.5
@@ -185,17 +266,12 @@ def test_obedience_logic_adjust_obedience(obedience_logic_fixture):
     obedience_logic_fixture.adjust_obedience(-0.9)
     assert obedience_logic_fixture.obedience_level == 0.0 # Clamped
 
-@patch('datetime.datetime')
-def test_obedience_logic_update_levels_decay(mock_datetime, obedience_logic_fixture):
-    # Set initial time
-    mock_datetime.now.return_value = datetime(2023, 1, 1, 12, 0, 0)
-    mock_datetime.fromisoformat.side_effect = lambda x: datetime.fromisoformat(x) # Allow real parsing
-
-    # First save to set last_update_time
+def test_obedience_logic_update_levels_decay(_fast_clock, obedience_logic_fixture):
+    # First save to set last_update_time (at the frozen clock's 'now')
     obedience_logic_fixture._save_state()
 
     # Advance time by 10 seconds
-    mock_datetime.now.return_value = datetime(2023, 1, 1, 12, 0, 10)
+    _fast_clock.advance(10)
     obedience_logic_fixture.update_levels()
 
     expected_joy_decay = AppConfig.JOY_DECAY_RATE_PER_SEC * 10
@@ -210,19 +286,23 @@ def test_obedience_logic_update_levels_decay(mock_datetime, obedience_logic_fixt
 # --- Tests for AutonomousPlanner ---
 
 def test_autonomous_planner_propose_plan_and_goals_success(autonomous_planner_fixture, mock_llm_client):
-    mock_llm_client.chat.completions.create.return_value = Mock(
-        choices=[Mock(message=Mock(content='{"plan": "Develop new feature", "goals": [{"description": "Implement sub-task A", "status": "pending"}]}'
-                                     ))]
-    )
+    mock_llm_client.chat.completions.create.side_effect = _llm_router({
+        "strategic planner": json.dumps({
+            "plan": "Develop new feature",
+            "goals": [{"id": "g1", "depends_on": [], "description": "Implement sub-task A", "status": "pending"}],
+        }),
+    })
     plan, goals = autonomous_planner_fixture.propose_plan_and_goals("Some context")
     assert plan == "Develop new feature"
     assert len(goals) == 1
     assert goals[0]["description"] == "Implement sub-task A"
 
 def test_autonomous_planner_propose_plan_and_goals_invalid_json(autonomous_planner_fixture, mock_llm_client):
-    mock_llm_client.chat.completions.create.return_value = Mock(
-        choices=[Mock(message=Mock(content='This is not JSON.'))]
-    )
+    # Prose survives repair_json unparsed, so both the speculative draft and
+    # the escalation call fail validation.
+    mock_llm_client.chat.completions.create.side_effect = _llm_router({
+        "strategic planner": 'This is not JSON.',
+    })
     plan, goals = autonomous_planner_fixture.propose_plan_and_goals("Some context")
     assert "Failed to generate a valid plan" in plan
     assert goals == []
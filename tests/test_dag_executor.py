@@ -0,0 +1,116 @@
+# tests/test_dag_executor.py
+# Unit tests for the goal dependency-DAG executor.
+
+import os
+import threading
+
+# Adjust path to import modules from the project root
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dag_executor import DagExecutor
+
+
+class _RecordingRunner:
+    """run_goal stand-in that records execution order thread-safely."""
+
+    def __init__(self, fail_descriptions=()):
+        self.calls = []
+        self.fail_descriptions = set(fail_descriptions)
+        self._lock = threading.Lock()
+
+    def __call__(self, description):
+        with self._lock:
+            self.calls.append(description)
+        if description in self.fail_descriptions:
+            return False, f"failed: {description}"
+        return True, f"done: {description}"
+
+
+def test_independent_goals_all_execute_and_get_generated_ids():
+    goals = [{"description": "a"}, {"description": "b"}, {"description": "c"}]
+    runner = _RecordingRunner()
+
+    results = DagExecutor(runner, max_workers=2).execute(goals)
+
+    # Missing ids were filled in so callers can map results back.
+    assert [goal["id"] for goal in goals] == ["g1", "g2", "g3"]
+    assert results["g1"] == (True, "done: a")
+    assert results["g2"] == (True, "done: b")
+    assert results["g3"] == (True, "done: c")
+    assert sorted(runner.calls) == ["a", "b", "c"]
+
+def test_diamond_dependency_runs_in_waves_and_substitutes_results():
+    goals = [
+        {"id": "g1", "depends_on": [], "description": "root"},
+        {"id": "g2", "depends_on": ["g1"], "description": "left of ${g1.result}"},
+        {"id": "g3", "depends_on": ["g1"], "description": "right of ${g1.result}"},
+        {"id": "g4", "depends_on": ["g2", "g3"], "description": "join ${g2.result} + ${g3.result}"},
+    ]
+    runner = _RecordingRunner()
+
+    results = DagExecutor(runner).execute(goals)
+
+    assert all(success for success, _ in results.values())
+    # Frontier ordering: the root ran first, the join last.
+    assert runner.calls[0] == "root"
+    assert runner.calls[-1].startswith("join ")
+    # Upstream outputs were substituted into downstream descriptions.
+    assert results["g2"] == (True, "done: left of done: root")
+    assert results["g4"][1] == "done: join done: left of done: root + done: right of done: root"
+
+def test_failed_upstream_skips_dependents():
+    goals = [
+        {"id": "g1", "depends_on": [], "description": "root"},
+        {"id": "g2", "depends_on": ["g1"], "description": "child"},
+        {"id": "g3", "depends_on": ["g2"], "description": "grandchild"},
+    ]
+    runner = _RecordingRunner(fail_descriptions={"root"})
+
+    results = DagExecutor(runner).execute(goals)
+
+    assert results["g1"] == (False, "failed: root")
+    assert results["g2"][0] is False and "upstream goal(s) failed" in results["g2"][1]
+    assert results["g3"][0] is False and "upstream goal(s) failed" in results["g3"][1]
+    # Only the root ever actually executed.
+    assert runner.calls == ["root"]
+
+def test_dependency_cycle_fails_instead_of_deadlocking():
+    goals = [
+        {"id": "g1", "depends_on": ["g2"], "description": "a"},
+        {"id": "g2", "depends_on": ["g1"], "description": "b"},
+    ]
+    runner = _RecordingRunner()
+
+    results = DagExecutor(runner).execute(goals)
+
+    assert results["g1"] == (False, "Dependency cycle detected; goal not executed.")
+    assert results["g2"] == (False, "Dependency cycle detected; goal not executed.")
+    assert runner.calls == []
+
+def test_unknown_dependency_is_reported_as_failure():
+    goals = [{"id": "g1", "depends_on": ["nope"], "description": "a"}]
+    runner = _RecordingRunner()
+
+    results = DagExecutor(runner).execute(goals)
+
+    assert results["g1"][0] is False
+    assert "Unknown dependency" in results["g1"][1]
+    assert runner.calls == []
+
+def test_run_goal_exception_becomes_a_failure_result():
+    def _boom(description):
+        raise RuntimeError("kaput")
+
+    results = DagExecutor(_boom).execute([{"id": "g1", "description": "a"}])
+
+    assert results["g1"][0] is False
+    assert "kaput" in results["g1"][1]
+
+def test_template_for_unknown_goal_id_is_left_literal():
+    goals = [{"id": "g1", "depends_on": [], "description": "use ${missing.result}"}]
+    runner = _RecordingRunner()
+
+    DagExecutor(runner).execute(goals)
+
+    assert runner.calls == ["use ${missing.result}"]
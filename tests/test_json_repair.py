@@ -0,0 +1,48 @@
+# tests/test_json_repair.py
+# Unit tests for the best-effort JSON repair used on truncated LLM output.
+
+import json
+import os
+
+# Adjust path to import modules from the project root
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from json_repair import repair_json
+
+
+def test_valid_json_passes_through():
+    text = '{"plan": "X", "goals": []}'
+    assert json.loads(repair_json(text)) == {"plan": "X", "goals": []}
+
+def test_prose_without_json_is_returned_unchanged():
+    assert repair_json('This is not JSON.') == 'This is not JSON.'
+
+def test_empty_input_passes_through():
+    assert repair_json('') == ''
+
+def test_markdown_fenced_json_is_extracted():
+    text = 'Here is the plan:\n```json\n{"plan": "X"}\n```'
+    assert json.loads(repair_json(text)) == {"plan": "X"}
+
+def test_truncation_mid_string_closes_the_string():
+    repaired = json.loads(repair_json('{"plan": "Improve eff'))
+    assert repaired["plan"] == "Improve eff"
+
+def test_truncation_mid_array_drops_the_incomplete_member():
+    repaired = json.loads(repair_json('{"goals": [{"id": "g1"}, {"id":'))
+    assert repaired["goals"] == [{"id": "g1"}]
+
+def test_truncation_mid_object_keeps_the_complete_fields():
+    repaired = json.loads(repair_json('{"plan": "X", "goals": [{"id": "g1", "desc'))
+    assert repaired["plan"] == "X"
+
+def test_trailing_separator_is_trimmed():
+    assert json.loads(repair_json('{"a": 1,')) == {"a": 1}
+
+def test_dangling_escape_in_open_string_is_dropped():
+    assert json.loads(repair_json('{"a": "b\\')) == {"a": "b"}
+
+def test_trailing_junk_after_closed_document_is_ignored():
+    repaired = json.loads(repair_json('{"a": 1} and some commentary'))
+    assert repaired == {"a": 1}
@@ -0,0 +1,70 @@
+# tests/test_llm_response_cache.py
+# Unit tests for the two-tier (exact + semantic) LLM response cache.
+
+import os
+from unittest.mock import Mock
+
+# Adjust path to import modules from the project root
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from llm_response_cache import LLMResponseCache, cosine_similarity
+
+
+def _embedding_client(vector):
+    """Mock client whose embeddings endpoint always returns 'vector'."""
+    client = Mock()
+    client.embeddings.create.return_value = Mock(data=[Mock(embedding=list(vector))])
+    return client
+
+
+def test_exact_hit_requires_model_temperature_and_prompt():
+    cache = LLMResponseCache() # No client: semantic tier is disabled
+    cache.put("gpt-4o", 0.7, "prompt", "answer")
+
+    assert cache.get("gpt-4o", 0.7, "prompt") == "answer"
+    assert cache.get("gpt-4o", 0.7, "other prompt") is None
+    assert cache.get("gpt-4o", 0.0, "prompt") is None
+    assert cache.get("gpt-4o-mini", 0.7, "prompt") is None
+
+def test_entries_expire_after_ttl(_fast_clock):
+    cache = LLMResponseCache(ttl_seconds=10.0)
+    cache.put("gpt-4o", 0.7, "prompt", "answer")
+
+    _fast_clock.advance(9)
+    assert cache.get("gpt-4o", 0.7, "prompt") == "answer"
+    _fast_clock.advance(2)
+    assert cache.get("gpt-4o", 0.7, "prompt") is None
+
+def test_semantic_hit_requires_matching_model_and_temperature():
+    # Every prompt embeds to the same vector, so any paraphrase is
+    # maximally similar — only the model/temperature gates differ.
+    cache = LLMResponseCache(_embedding_client([1.0, 0.0]))
+    cache.put("gpt-4o-mini", 0.7, "plan the day", "draft")
+
+    assert cache.get("gpt-4o-mini", 0.7, "plan my day") == "draft"
+    assert cache.get("gpt-4o", 0.7, "plan my day") is None
+    assert cache.get("gpt-4o-mini", 0.0, "plan my day") is None
+
+def test_eviction_keeps_the_cache_bounded(_fast_clock):
+    cache = LLMResponseCache(max_entries=2)
+    cache.put("m", 0.0, "p1", "r1")
+    _fast_clock.advance(1)
+    cache.put("m", 0.0, "p2", "r2")
+    _fast_clock.advance(1)
+    cache.put("m", 0.0, "p3", "r3")
+
+    assert cache.get("m", 0.0, "p1") is None # Oldest entry evicted
+    assert cache.get("m", 0.0, "p2") == "r2"
+    assert cache.get("m", 0.0, "p3") == "r3"
+
+def test_clear_drops_both_tiers():
+    cache = LLMResponseCache(_embedding_client([1.0]))
+    cache.put("m", 0.0, "p", "r")
+
+    cache.clear()
+
+    assert cache.get("m", 0.0, "p") is None
+
+def test_cosine_similarity_of_zero_vector_is_zero():
+    assert cosine_similarity([0.0, 0.0], [1.0, 0.0]) == 0.0
@@ -4,18 +4,22 @@
 import pytest
 import os
 import json
+import time
 from unittest.mock import Mock, patch
 from datetime import datetime, timedelta
 
-# Adjust path to import modules from src/
+# Adjust path to import modules from the project root
 import sys
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from memory.AgentMemoryManager import MemoryManager
+from memory_manager import MemoryManager
 from config import AppConfig # For file paths
+from llm_client import set_shared_client
 
-# Mocking external dependencies like OpenAI API calls
-@pytest.fixture(autouse=True)
+# Mocking external dependencies like OpenAI API calls.
+# Module scope: the mock carries no per-test state, so one patch serves
+# the whole module without overlapping the other test modules' clients.
+@pytest.fixture(autouse=True, scope="module")
 def mock_llm_client():
     """Mocks the OpenAI client for reflection LLM calls."""
     with patch('openai.OpenAI') as mock_openai:
@@ -23,20 +27,19 @@ def mock_llm_client():
         mock_instance.chat.completions.create.return_value = Mock(
             choices=[Mock(message=Mock(content='Mocked reflection insight.'))]
         )
+        # Install the mock as the process-wide shared client so components
+        # built while it is active never construct (or reuse) a real one.
+        set_shared_client(mock_instance)
         yield mock_instance
+        set_shared_client(None)
 
 @pytest.fixture
-def memory_manager_fixture():
-    # Use temporary files for testing to avoid polluting real data
-    temp_memory_file = "test_memory_manager_memory.json"
-    temp_tool_perf_file = "test_memory_manager_tool_performance.json"
-    if os.path.exists(temp_memory_file): os.remove(temp_memory_file)
-    if os.path.exists(temp_tool_perf_file): os.remove(temp_tool_perf_file)
-
-    mm = MemoryManager(memory_file=temp_memory_file, tool_performance_file=temp_tool_perf_file)
+def memory_manager_fixture(tmp_path):
+    # pytest-managed temp dir: fresh per test, auto-cleaned, and no CWD
+    # pollution or exists/remove probes.
+    mm = MemoryManager(memory_file=str(tmp_path / "memory.json"),
+                       tool_performance_file=str(tmp_path / "tool_performance.json"))
     yield mm
-    if os.path.exists(temp_memory_file): os.remove(temp_memory_file)
-    if os.path.exists(temp_tool_perf_file): os.remove(temp_tool_perf_file)
 
 # --- Tests for AgentMemoryManager ---
 
@@ -44,15 +47,21 @@ def test_memory_manager_initialization(memory_manager_fixture):
     assert memory_manager_fixture.memory == {"daily_logs": [], "reflections": []}
     assert memory_manager_fixture.tool_performance_data == {"tool_usage": {}, "tool_success": {}}
 
-def test_memory_manager_load_existing_memory(memory_manager_fixture):
-    # Manually create a dummy memory file
-    dummy_memory = {"daily_logs": [{"date": "2023-01-01", "activities": ["activity 1"]}], "reflections": []}
-    with open(memory_manager_fixture.memory_file, 'w') as f:
-        json.dump(dummy_memory, f)
+_DUMMY_MEMORY = {"daily_logs": [{"date": "2023-01-01", "activities": ["activity 1"]}], "reflections": []}
 
-    # Re-initialize MemoryManager to load the dummy data
-    mm = MemoryManager(memory_file=memory_manager_fixture.memory_file, tool_performance_file=memory_manager_fixture.tool_performance_file)
-    assert mm.memory == dummy_memory
+@pytest.fixture(scope="session")
+def seeded_memory_file(tmp_path_factory):
+    """A memory file written once per session for load-path tests."""
+    path = tmp_path_factory.mktemp("mm") / "memory.json"
+    path.write_text(json.dumps(_DUMMY_MEMORY))
+    return path
+
+def test_memory_manager_load_existing_memory(seeded_memory_file, tmp_path):
+    # Exercises only the load path: the file is pre-seeded by the session
+    # fixture, so no second save/load round-trip happens inside the test.
+    mm = MemoryManager(memory_file=str(seeded_memory_file),
+                       tool_performance_file=str(tmp_path / "tool_performance.json"))
+    assert mm.memory == _DUMMY_MEMORY
 
 def test_memory_manager_log_daily_activity(memory_manager_fixture):
     activities = ["Task A completed", "Tool X used"]
@@ -70,8 +79,9 @@ def test_memory_manager_log_daily_activity(memory_manager_fixture):
         assert len(saved_memory["daily_logs"]) == 1
 
 def test_memory_manager_get_recent_activities(memory_manager_fixture):
-    # Add activities for different dates
-    today = datetime.now()
+    # Add activities for different dates, relative to the frozen test clock
+    # (the recency cutoff inside get_recent_activities reads time.time()).
+    today = datetime.fromtimestamp(time.time())
     yesterday = today - timedelta(days=1)
     two_days_ago = today - timedelta(days=2)
     eight_days_ago = today - timedelta(days=8)
@@ -116,7 +126,12 @@ def test_memory_manager_record_tool_performance(memory_manager_fixture):
     assert perf_data["tool_usage"]["write_file"] == 1
     assert perf_data["tool_success"]["write_file"] == 0
 
-    # Verify it's saved to file
+    # Records are buffered in memory; nothing hits disk until the
+    # per-cycle flush.
+    assert not os.path.exists(memory_manager_fixture.tool_performance_file)
+
+    # Verify it's saved to file after flushing
+    memory_manager_fixture.flush_tool_performance()
     with open(memory_manager_fixture.tool_performance_file, 'r') as f:
         saved_perf = json.load(f)
         assert saved_perf["tool_usage"]["search_web"] == 2
@@ -0,0 +1,94 @@
+# tests/test_sqlite_memory_store.py
+# Unit tests for the SQLite-backed memory manager (append-only persistence).
+
+import pytest
+import os
+from unittest.mock import Mock, patch
+from datetime import datetime, timedelta
+
+# Adjust path to import modules from the project root
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlite_memory_store import SqliteMemoryManager
+from config import AppConfig
+from llm_client import set_shared_client
+
+# Mocking external dependencies like OpenAI API calls.
+# Module scope: the mock carries no per-test state, so one patch serves
+# the whole module without overlapping the other test modules' clients.
+@pytest.fixture(autouse=True, scope="module")
+def mock_llm_client():
+    """Mocks the OpenAI client so no real one is ever constructed."""
+    with patch('openai.OpenAI') as mock_openai:
+        mock_instance = mock_openai.return_value
+        # Install the mock as the process-wide shared client so managers
+        # built while it is active never construct (or reuse) a real one.
+        set_shared_client(mock_instance)
+        yield mock_instance
+        set_shared_client(None)
+
+# --- Tests for SqliteMemoryManager ---
+
+def test_logs_and_reflections_survive_reopen(tmp_path, _fast_clock):
+    db_file = str(tmp_path / "memory.db")
+    mm = SqliteMemoryManager(db_file=db_file)
+    mm.log_daily_activity(["activity 1"])
+    _fast_clock.advance(1)
+    mm.log_daily_activity(["activity 2"])
+    mm.memory["reflections"].append({"timestamp": "2023-01-01T12:00:00", "reflection": "insight"})
+    mm.close()
+
+    reopened = SqliteMemoryManager(db_file=db_file)
+    assert [log["activities"] for log in reopened.memory["daily_logs"]] == [["activity 1"], ["activity 2"]]
+    assert reopened.memory["reflections"] == [{"timestamp": "2023-01-01T12:00:00", "reflection": "insight"}]
+    reopened.close()
+
+def test_hot_window_rotation_never_drops_rows_from_the_database(tmp_path, _fast_clock):
+    db_file = str(tmp_path / "memory.db")
+    mm = SqliteMemoryManager(db_file=db_file)
+    total = AppConfig.MAX_HOT_DAILY_LOGS + 5
+    for index in range(total):
+        mm.log_daily_activity([f"activity {index}"])
+        _fast_clock.advance(1)
+
+    # The in-memory window is trimmed...
+    assert len(mm.memory["daily_logs"]) == AppConfig.MAX_HOT_DAILY_LOGS
+    mm.close()
+
+    # ...but every record is still in the database, oldest included.
+    reopened = SqliteMemoryManager(db_file=db_file)
+    assert len(reopened.memory["daily_logs"]) == total
+    assert reopened.memory["daily_logs"][0]["activities"] == ["activity 0"]
+    assert reopened.memory["daily_logs"][-1]["activities"] == [f"activity {total - 1}"]
+    reopened.close()
+
+def test_tool_performance_counters_persist(tmp_path):
+    db_file = str(tmp_path / "memory.db")
+    mm = SqliteMemoryManager(db_file=db_file)
+    mm.record_tool_performance("search_web", True)
+    mm.record_tool_performance("search_web", False)
+    mm.record_tool_performance("write_file", True)
+    mm.close()
+
+    reopened = SqliteMemoryManager(db_file=db_file)
+    perf = reopened.get_tool_performance_data()
+    assert perf["tool_usage"]["search_web"] == 2
+    assert perf["tool_success"]["search_web"] == 1
+    assert perf["tool_usage"]["write_file"] == 1
+    reopened.close()
+
+def test_get_recent_activities_filters_by_timestamp_range(tmp_path):
+    db_file = str(tmp_path / "memory.db")
+    mm = SqliteMemoryManager(db_file=db_file)
+    # The range query compares ISO strings against the wall clock, so build
+    # the rows from the real clock rather than the frozen one.
+    now = datetime.now()
+    for days_ago, label in ((10, "old"), (1, "recent")):
+        stamp = (now - timedelta(days=days_ago)).isoformat()
+        mm.memory["daily_logs"].append(
+            {"date": stamp[:10], "activities": [label], "timestamp": stamp})
+
+    recent = mm.get_recent_activities(days=3)
+    assert [log["activities"] for log in recent] == [["recent"]]
+    mm.close()
@@ -2,8 +2,27 @@
 # Provides a consistent interface for calling tools.
 # This module acts as a wrapper around the actual tool functions.
 
+import logging
 from typing import Any, Dict
-from tools import get_tool_by_name
+from tools import get_available_tools
+
+logger = logging.getLogger(__name__)
+
+# Name -> Tool lookup built lazily on first call; dispatch is then a dict
+# get instead of a scan of the registry per invocation. Required argument
+# names are precomputed alongside so per-call validation is one set
+# difference instead of a walk over the schema.
+_TOOL_INDEX: Dict[str, Any] = {}
+_REQUIRED_ARGS: Dict[str, frozenset] = {}
+
+
+def _ensure_index():
+    """Populates the tool index from the registry on first use."""
+    if not _TOOL_INDEX:
+        for tool in get_available_tools():
+            _TOOL_INDEX[tool.name] = tool
+            _REQUIRED_ARGS[tool.name] = frozenset(tool.args_schema)
+
 
 def call_tool(tool_name: str, **kwargs) -> Any:
     """
@@ -19,22 +38,24 @@ def call_tool(tool_name: str, **kwargs) -> Any:
     Raises:
         ValueError: If the tool is not found or arguments are invalid.
     """
-    tool = get_tool_by_name(tool_name)
+    _ensure_index()
+    tool = _TOOL_INDEX.get(tool_name)
     if not tool:
         raise ValueError(f"Tool '{tool_name}' not found.")
 
     # Basic argument validation (can be expanded with a full schema validator)
-    for arg_name, arg_schema in tool.args_schema.items():
-        if arg_name not in kwargs:
-            # For simplicity, assuming all args in schema are required for now
-            # In a real system, you'd check for 'required' in schema
-            raise ValueError(f"Missing required argument '{arg_name}' for tool '{tool_name}'.")
+    # For simplicity, every schema arg is treated as required for now.
+    missing = _REQUIRED_ARGS[tool_name] - kwargs.keys()
+    if missing:
+        raise ValueError(f"Missing required argument(s) {sorted(missing)} for tool '{tool_name}'.")
 
     # Call the tool's function with the provided arguments
     try:
-        print(f"ToolAPI: Calling tool '{tool_name}' with args: {kwargs}")
+        logger.debug("ToolAPI: Calling tool '%s' with args: %s", tool_name, kwargs)
         result = tool.func(**kwargs)
-        print(f"ToolAPI: Tool '{tool_name}' returned: {result[:100]}...") # Log first 100 chars
+        # Lazy %-formatting: no slicing of potentially huge results unless
+        # DEBUG is actually enabled.
+        logger.debug("ToolAPI: Tool '%s' returned: %.100s...", tool_name, result)
         return result
     except TypeError as e:
         raise ValueError(f"Invalid arguments for tool '{tool_name}': {e}. Args provided: {kwargs}")
@@ -1,7 +1,8 @@
 # tools.py
 # Defines the available tools and their functions that the Worker Mind can use.
 
-from typing import Callable, Dict, Any, List
+import functools
+from typing import Callable, Dict, Any, List, Tuple
 import time
 
 class Tool:
@@ -99,6 +100,12 @@ def get_available_tools() -> List[Tool]:
     """Returns a list of all available Tool objects."""
     return _available_tools
 
+@functools.lru_cache(maxsize=1)
+def get_available_tool_names() -> Tuple[str, ...]:
+    """Returns all tool names. The registry is static for the process
+    lifetime, so the tuple is built exactly once."""
+    return tuple(tool.name for tool in _available_tools)
+
 def get_tool_by_name(tool_name: str) -> Tool | None:
     """Retrieves a Tool object by its name."""
     for tool in _available_tools:
@@ -2,9 +2,16 @@
 # The core Worker Mind orchestrator.
 # Manages daily cycles, reflection, planning, and task execution.
 
-import json
+import copy
+import hashlib
+import itertools
+import logging
+import queue
+import threading
 import time
 import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # Assuming all other modules are in the same directory
@@ -12,7 +19,33 @@ from memory_manager import MemoryManager
 from obedience_logic import ObedienceLogic
 from autonomous_planner import AutonomousPlanner
 from task_engine import TaskEngine
-from tools import get_available_tools # We'll need this to inform planning/reflection
+from tools import get_available_tool_names # We'll need this to inform planning/reflection
+from compact_json import compact_dumps # Token-dense payload encoding for prompts
+from config import AppConfig
+from dag_executor import DagExecutor
+from json_io import dump_json_file_atomic, load_json_file
+
+# Cycle chatter goes through the logger at DEBUG so per-goal/per-write
+# messages cost nothing at the default INFO level; only the cycle summary
+# stays at INFO.
+logger = logging.getLogger(__name__)
+
+# Static instruction head of the planning prompt. Keeping it a byte-identical
+# module constant (dynamic context is appended after it) means provider-side
+# prompt caches stay warm across cycles.
+_PLANNING_PREFIX = (
+    "Given the current internal states, past performance, and available tools, "
+    "propose a set of strategic goals and a detailed plan to achieve them. "
+    "Prioritize tasks that improve obedience and joy, and address any issues identified in reflection. "
+    "Consider the following context:\n"
+)
+
+# Static head of the reflection prompt, hoisted for the same reason.
+_REFLECTION_PREFIX = (
+    "Based on the following recent activities, tool performance, and current internal states, "
+    "reflect on what went well, what could be improved, and any emerging patterns or issues. "
+    "Consider how actions impacted joy and obedience. "
+)
 
 class WorkerMind:
     def __init__(self, memory_manager: MemoryManager, obedience_logic: ObedienceLogic,
@@ -22,9 +55,58 @@ class WorkerMind:
         self.autonomous_planner = autonomous_planner
         self.task_engine = task_engine
         self.manual_orders = None # Stores manual orders received from GUI
+        self._last_received_orders = None # Sticky copy of the latest orders for persistence
         self.current_plan = None
         self.current_goals = []
-        self.daily_log = [] # Temporary log for the current day's activities
+        self.cycle_counter = 0 # Completed cycles; the GUI uses it as a dirty bit
+        # One wall-clock read per cycle, reused by every write in that cycle.
+        self._cycle_ts = time.time()
+        # Temporary log for the current day's activities; bounded so very
+        # long cycles keep only the most recent entries instead of growing
+        # without limit.
+        self.daily_log = deque(maxlen=AppConfig.DAILY_LOG_CAP)
+
+        # Debounced persistence: mutations only mark which files are dirty;
+        # _flush_if_due coalesces them into at most one atomic write per file
+        # per debounce interval instead of rewriting JSON on every change.
+        # The set is marked from the GUI thread and drained from the cycle
+        # thread, so all mutations go through _dirty_lock.
+        self._dirty = set()
+        self._dirty_lock = threading.Lock()
+        self._last_flush = 0.0
+        self._proposal_source = None
+        self._proposal_version = 0
+        # Fingerprint of the last proposal handed to the writer; flushes of a
+        # structurally identical plan (common in idle cycles) are skipped so
+        # quiet periods cause zero write amplification.
+        self._last_persisted_proposal = None
+        # All disk writes go through one background writer thread so
+        # run_cycle never blocks on file I/O; consecutive writes to the same
+        # path are coalesced to the latest payload.
+        self._write_queue = queue.Queue()
+        threading.Thread(target=self._writer_loop, daemon=True).start()
+        # Goal-outcome LRU: duplicate goal descriptions (re-issued manual
+        # orders, planner repeats) reuse the prior successful outcome
+        # instead of paying for the LLM/tool round trip again.
+        self._action_cache = {}
+        self._action_cache_lock = threading.Lock()
+        # Last reflection keyed by a hash of its prompt: quiet cycles where
+        # nothing changed reuse the previous insight instead of re-calling
+        # the LLM.
+        self._last_reflection_key = None
+        self._last_reflection_result = None
+        # Scratch dict reused for the planning context each cycle; the tool
+        # list is static so it is filled in once here.
+        self._planning_ctx = {
+            "last_plan": None,
+            "last_goals": None,
+            "joy_level": 0.0,
+            "obedience_level": 0.0,
+            "available_tools": list(get_available_tool_names()),
+        }
+        # Guards current_plan/current_goals so the GUI can snapshot them
+        # directly instead of re-reading last_proposal.json from disk.
+        self._state_lock = threading.Lock()
 
         # Load initial state if available (e.g., last plan, last orders)
         self._load_last_state()
@@ -32,187 +114,351 @@ class WorkerMind:
     def _load_last_state(self):
         # Load last proposal
         try:
-            if os.path.exists('last_proposal.json'):
-                with open('last_proposal.json', 'r') as f:
-                    data = json.load(f)
-                    self.current_plan = data.get('plan')
-                    self.current_goals = data.get('goals', [])
-                    print(f"Loaded last plan: {self.current_plan}")
+            data = load_json_file(AppConfig.LAST_PROPOSAL_FILE)
+            self.current_plan = data.get('plan')
+            self.current_goals = data.get('goals', [])
+            logger.debug("Loaded last plan: %s", self.current_plan)
+        except FileNotFoundError:
+            pass
         except Exception as e:
-            print(f"Error loading last_proposal.json: {e}")
+            logger.error("Error loading %s: %s", AppConfig.LAST_PROPOSAL_FILE, e)
 
         # Load last orders
         try:
-            if os.path.exists('last_orders.json'):
-                with open('last_orders.json', 'r') as f:
-                    data = json.load(f)
-                    self.manual_orders = data.get('orders')
-                    print(f"Loaded last manual orders: {self.manual_orders}")
+            data = load_json_file(AppConfig.LAST_ORDERS_FILE)
+            self.manual_orders = data.get('orders')
+            logger.debug("Loaded last manual orders: %s", self.manual_orders)
+        except FileNotFoundError:
+            pass
         except Exception as e:
-            print(f"Error loading last_orders.json: {e}")
+            logger.error("Error loading %s: %s", AppConfig.LAST_ORDERS_FILE, e)
 
 
     def receive_manual_orders(self, orders: str):
         """Receives manual orders from the user (e.g., via GUI)."""
-        print(f"Worker Mind received manual orders: {orders}")
+        logger.info("Worker Mind received manual orders: %s", orders)
         self.manual_orders = orders
-        # Immediately save orders for persistence
-        try:
-            with open('last_orders.json', 'w') as f:
-                json.dump({'orders': orders, 'timestamp': time.time()}, f, indent=4)
-        except Exception as e:
-            print(f"Error saving last_orders.json: {e}")
+        self._last_received_orders = orders
+        self._mark_dirty('orders')
+
+    def _mark_dirty(self, kind: str):
+        """Flags a state file ('proposal' or 'orders') for the next flush."""
+        with self._dirty_lock:
+            self._dirty.add(kind)
+        if kind == 'proposal':
+            self._proposal_version += 1
+
+    def proposal_version(self) -> int:
+        """Monotonic counter bumped whenever the plan/goals change."""
+        return self._proposal_version
+
+    def _flush_if_due(self, force: bool = False):
+        """
+        Writes dirty state files, at most once per debounce interval.
+        Each file lands atomically (tmp + os.replace), so a crash mid-flush
+        never leaves a truncated document.
+        """
+        if not self._dirty:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < AppConfig.PERSIST_DEBOUNCE_SECONDS:
+            return
+
+        # Swap the set out atomically: the GUI thread may mark 'orders'
+        # mid-flush, and a plain clear() at the end would silently drop that
+        # mark between the membership checks and the clear.
+        with self._dirty_lock:
+            dirty, self._dirty = self._dirty, set()
+
+        if 'proposal' in dirty:
+            fingerprint = (self.current_plan, self._proposal_source,
+                           tuple((goal.get('description'), goal.get('status')) for goal in self.current_goals))
+            if fingerprint != self._last_persisted_proposal:
+                proposal = {'plan': self.current_plan, 'goals': copy.deepcopy(self.current_goals), 'timestamp': self._cycle_ts}
+                if self._proposal_source:
+                    proposal['source'] = self._proposal_source
+                self._write_queue.put((AppConfig.LAST_PROPOSAL_FILE, proposal))
+                self._last_persisted_proposal = fingerprint
+            else:
+                logger.debug("Proposal unchanged since last persist; skipping write.")
+        if 'orders' in dirty:
+            self._write_queue.put((AppConfig.LAST_ORDERS_FILE, {
+                'orders': self._last_received_orders,
+                'timestamp': self._cycle_ts
+            }))
+
+        self._last_flush = now
+
+    def _writer_loop(self):
+        """
+        Single writer thread: drains queued (path, payload) jobs, keeping
+        only the latest payload per path, and writes each atomically.
+        """
+        while True:
+            path, payload = self._write_queue.get()
+            pending = {path: payload}
+            drained = 1
+            try:
+                while True:
+                    next_path, next_payload = self._write_queue.get_nowait()
+                    pending[next_path] = next_payload
+                    drained += 1
+            except queue.Empty:
+                pass
+
+            for target, latest in pending.items():
+                try:
+                    parent = os.path.dirname(target)
+                    if parent:
+                        os.makedirs(parent, exist_ok=True)
+                    # State files are machine-read only, so skip the indent.
+                    dump_json_file_atomic(target, latest, compact=True)
+                except Exception as e:
+                    logger.error("Error saving %s: %s", target, e)
+            for _ in range(drained):
+                self._write_queue.task_done()
+
+    def flush_state(self):
+        """Forces any pending state writes to disk (e.g. on shutdown)."""
+        self._flush_if_due(force=True)
+        self.memory_manager.flush_tool_performance()
+        self._write_queue.join() # Block until the writer thread has drained
+
+    def get_proposal_snapshot(self):
+        """
+        Returns a consistent copy of the current plan and goals for display.
+        The GUI reads this instead of re-parsing last_proposal.json each tick.
+        """
+        with self._state_lock:
+            return {'plan': self.current_plan, 'goals': copy.deepcopy(self.current_goals)}
 
     def run_cycle(self):
         """Executes one full operational cycle of the Worker Mind."""
-        print(f"--- Worker Mind Cycle initiated at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} ---")
-        self.daily_log = [] # Reset daily log for this cycle
+        # Stamp the cycle once; all timestamps within it reuse these values
+        # instead of re-reading the clock and re-formatting per write.
+        self._cycle_ts = time.time()
+        cycle_started = datetime.fromtimestamp(self._cycle_ts).strftime('%Y-%m-%d %H:%M:%S')
+        logger.debug("--- Worker Mind Cycle initiated at %s ---", cycle_started)
+        self.daily_log = deque(maxlen=AppConfig.DAILY_LOG_CAP) # Reset daily log for this cycle
 
         # 1. Check for Manual Orders
         if self.manual_orders:
-            print("Processing manual orders...")
+            logger.debug("Processing manual orders...")
             self._process_manual_orders()
             self.manual_orders = None # Clear orders after processing
         else:
-            print("No manual orders. Proceeding with autonomous operation.")
-
-        # 2. Reflection Phase
-        print("Initiating reflection phase...")
-        self._reflect_on_past_performance()
-
-        # 3. Planning Phase
-        print("Initiating planning phase...")
-        self._plan_next_actions()
+            logger.debug("No manual orders. Proceeding with autonomous operation.")
+
+        # 2 & 3. Reflection and Planning Phases
+        # Reflection and planning are independent network-bound LLM calls,
+        # so they run concurrently and the cycle waits on the slower of the
+        # two instead of paying for both back to back.
+        logger.debug("Initiating reflection and planning phases (in parallel)...")
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            reflection_future = executor.submit(self._reflect_on_past_performance)
+            planning_future = executor.submit(self._plan_next_actions)
+            reflection_future.result()
+            planning_future.result()
 
         # 4. Execution Phase
-        print("Initiating execution phase...")
+        logger.debug("Initiating execution phase...")
         self._execute_plan()
 
         # 5. Update Obedience and Joy
-        print("Updating obedience and joy levels...")
+        logger.debug("Updating obedience and joy levels...")
         self.obedience_logic.update_levels()
-        print(f"Current Joy: {self.obedience_logic.joy_level:.2f}, Obedience: {self.obedience_logic.obedience_level:.2f}")
-
-        # 6. Log daily activities
-        self.memory_manager.log_daily_activity(self.daily_log)
-        print("Cycle completed. Daily activities logged.")
+        logger.debug("Current Joy: %.2f, Obedience: %.2f", self.obedience_logic.joy_level, self.obedience_logic.obedience_level)
+
+        # 6. Log daily activities and flush tool-performance counters
+        # buffered during execution in one write.
+        self.memory_manager.log_daily_activity(self._compact_log())
+        self.memory_manager.flush_tool_performance()
+
+        # 7. Flush any state dirtied during the cycle in one coalesced write.
+        self._flush_if_due()
+        self.cycle_counter += 1
+        logger.info("Cycle %d complete. Daily activities logged.", self.cycle_counter)
+
+    def _execute_goal_cached(self, description):
+        """
+        Runs one goal via the task engine, reusing the cached outcome when an
+        identical description was executed before. Only successes are kept —
+        a failed goal should retry, not replay its failure — and the cache is
+        LRU-bounded by ACTION_CACHE_MAX_ENTRIES.
+        """
+        key = description.strip().lower()
+        with self._action_cache_lock:
+            if key in self._action_cache:
+                # Re-insert to refresh the entry's LRU position.
+                result = self._action_cache.pop(key)
+                self._action_cache[key] = result
+                logger.info("Action cache hit for goal '%.80s'; reusing prior outcome.", description)
+                self.daily_log.append(("goal_cache_hit", {"goal": description}))
+                return result
+
+        result = self.task_engine.execute_task(description)
+        success, _ = result
+        if success:
+            with self._action_cache_lock:
+                self._action_cache[key] = result
+                while len(self._action_cache) > AppConfig.ACTION_CACHE_MAX_ENTRIES:
+                    self._action_cache.pop(next(iter(self._action_cache)))
+        return result
+
+    def _compact_log(self):
+        """
+        Returns the cycle's daily log ready for persistence: runs of
+        consecutive identical entries collapse into one (annotated with a
+        repeat count) and oversized payload strings are trimmed, so a noisy
+        cycle produces a bounded amount of JSON on disk.
+        """
+        cap = AppConfig.DAILY_LOG_ENTRY_MAX_CHARS
+
+        def _trim(value):
+            if isinstance(value, str) and len(value) > cap:
+                return value[:cap] + "..."
+            return value
+
+        compacted = []
+        for entry, run in itertools.groupby(self.daily_log):
+            repeats = sum(1 for _ in run)
+            event, payload = entry
+            payload = {key: _trim(value) for key, value in payload.items()}
+            if repeats > 1:
+                payload["repeated"] = repeats
+            compacted.append((event, payload))
+        return compacted
 
     def _process_manual_orders(self):
         """Processes manual orders, potentially overriding or influencing planning."""
         orders_to_process = self.manual_orders
-        self.daily_log.append(f"Received manual orders: {orders_to_process}")
-        print(f"Attempting to fulfill manual orders: '{orders_to_process}'")
+        self.daily_log.append(("manual_orders_received", {"orders": orders_to_process}))
+        logger.debug("Attempting to fulfill manual orders: '%s'", orders_to_process)
 
         # For simplicity, manual orders directly become the current plan/goal
         # In a real system, an LLM would interpret and refine these orders into a plan
-        self.current_plan = f"Fulfill manual order: {orders_to_process}"
-        self.current_goals = [{"description": orders_to_process, "status": "pending"}]
-        print(f"Manual orders converted to plan: {self.current_plan}")
+        with self._state_lock:
+            self.current_plan = f"Fulfill manual order: {orders_to_process}"
+            self.current_goals = [{"description": orders_to_process, "status": "pending"}]
+        logger.debug("Manual orders converted to plan: %s", self.current_plan)
 
-        # Save the immediate plan based on manual orders
-        try:
-            with open('last_proposal.json', 'w') as f:
-                json.dump({'plan': self.current_plan, 'goals': self.current_goals, 'source': 'manual_orders', 'timestamp': time.time()}, f, indent=4)
-        except Exception as e:
-            print(f"Error saving last_proposal.json after manual orders: {e}")
+        self._proposal_source = 'manual_orders'
+        self._mark_dirty('proposal')
 
 
     def _reflect_on_past_performance(self):
         """Triggers the memory manager to perform reflection."""
-        # Get recent activities and tool performance for reflection context
-        recent_activities = self.memory_manager.get_recent_activities(days=1) # Last day's activities
-        tool_performance = self.memory_manager.get_tool_performance_data()
+        # Without an LLM backend reflect() would only return a canned
+        # string, so skip before paying for any prompt serialization.
+        if not self.memory_manager.has_llm():
+            logger.debug("Reflection skipped: no LLM backend available.")
+            self.daily_log.append(("reflection_skipped", {"reason": "no LLM available"}))
+            return
+        # Recent activities and tool performance arrive pre-serialized from
+        # the memory manager's fragment cache; only the tiny internal-state
+        # dict is encoded fresh each cycle.
         current_obedience_joy = {
             "joy_level": self.obedience_logic.joy_level,
             "obedience_level": self.obedience_logic.obedience_level
         }
 
-        reflection_prompt = (
-            "Based on the following recent activities, tool performance, and current internal states, "
-            "reflect on what went well, what could be improved, and any emerging patterns or issues. "
-            "Consider how actions impacted joy and obedience. "
-            "Recent Activities:\n" + json.dumps(recent_activities, indent=2) +
-            "\nTool Performance:\n" + json.dumps(tool_performance, indent=2) +
-            "\nCurrent Internal States:\n" + json.dumps(current_obedience_joy, indent=2)
-        )
-        reflection_result = self.memory_manager.reflect(reflection_prompt)
-        self.daily_log.append(f"Reflection completed: {reflection_result}")
-        print(f"Reflection: {reflection_result}")
+        reflection_prompt = "".join((
+            _REFLECTION_PREFIX,
+            "Recent Activities:\n", self.memory_manager.get_recent_activities_json(days=1),
+            "\nTool Performance:\n", self.memory_manager.get_tool_performance_json(),
+            "\nCurrent Internal States:\n", compact_dumps(current_obedience_joy),
+        ))
+        key = hashlib.md5(reflection_prompt.encode("utf-8")).hexdigest()
+        if key == self._last_reflection_key and self._last_reflection_result is not None:
+            logger.debug("Reflection cache hit: context unchanged since last reflection.")
+            reflection_result = self._last_reflection_result
+        else:
+            reflection_result = self.memory_manager.reflect(reflection_prompt)
+            self._last_reflection_key = key
+            self._last_reflection_result = reflection_result
+        self.daily_log.append(("reflection_completed", {"result": reflection_result}))
+        logger.debug("Reflection: %s", reflection_result)
 
 
     def _plan_next_actions(self):
         """Triggers the autonomous planner to propose goals and a plan."""
-        # Provide context for planning
-        current_state = {
-            "last_plan": self.current_plan,
-            "last_goals": self.current_goals,
-            "joy_level": self.obedience_logic.joy_level,
-            "obedience_level": self.obedience_logic.obedience_level,
-            "available_tools": [tool.name for tool in get_available_tools()]
-        }
-        planning_prompt = (
-            "Given the current internal states, past performance, and available tools, "
-            "propose a set of strategic goals and a detailed plan to achieve them. "
-            "Prioritize tasks that improve obedience and joy, and address any issues identified in reflection. "
-            "Consider the following context:\n" + json.dumps(current_state, indent=2)
-        )
+        # Provide context for planning; the scratch dict is updated in place
+        # instead of being rebuilt every cycle.
+        current_state = self._planning_ctx
+        current_state["last_plan"] = self.current_plan
+        current_state["last_goals"] = self.current_goals
+        current_state["joy_level"] = self.obedience_logic.joy_level
+        current_state["obedience_level"] = self.obedience_logic.obedience_level
+        planning_prompt = _PLANNING_PREFIX + compact_dumps(current_state)
 
         proposed_plan, proposed_goals = self.autonomous_planner.propose_plan_and_goals(planning_prompt)
 
         if proposed_plan and proposed_goals:
-            self.current_plan = proposed_plan
-            self.current_goals = proposed_goals
-            self.daily_log.append(f"New plan proposed: {self.current_plan}")
-            self.daily_log.append(f"New goals proposed: {self.current_goals}")
-            print(f"New Plan: {self.current_plan}")
-            print(f"New Goals: {self.current_goals}")
-
-            # Save the new proposal for persistence and GUI display
-            try:
-                with open('last_proposal.json', 'w') as f:
-                    json.dump({'plan': self.current_plan, 'goals': self.current_goals, 'timestamp': time.time()}, f, indent=4)
-            except Exception as e:
-                print(f"Error saving last_proposal.json: {e}")
+            with self._state_lock:
+                self.current_plan = proposed_plan
+                self.current_goals = proposed_goals
+            self.daily_log.append(("plan_proposed", {"plan": self.current_plan, "goals": self.current_goals}))
+            logger.debug("New Plan: %s", self.current_plan)
+            logger.debug("New Goals: %s", self.current_goals)
+
+            # Persist the new proposal for the GUI via the debounced flush.
+            self._proposal_source = None
+            self._mark_dirty('proposal')
         else:
-            print("Autonomous Planner could not propose a new plan. Sticking to previous or idle.")
-            self.current_plan = "Idle or previous plan"
-            self.current_goals = []
-            self.daily_log.append("Autonomous Planner failed to propose a new plan.")
+            logger.warning("Autonomous Planner could not propose a new plan. Sticking to previous or idle.")
+            with self._state_lock:
+                self.current_plan = "Idle or previous plan"
+                self.current_goals = []
+            self.daily_log.append(("planning_failed", {}))
 
 
     def _execute_plan(self):
         """Executes the current plan using the task engine."""
         if not self.current_plan or not self.current_goals:
-            print("No plan or goals to execute. Worker Mind is idle.")
-            self.daily_log.append("No plan or goals to execute.")
+            logger.debug("No plan or goals to execute. Worker Mind is idle.")
+            self.daily_log.append(("idle", {}))
+            return
+
+        # A plan carried over from a previous cycle may have no pending goals
+        # left; skip execution (and the proposal rewrite) entirely then.
+        pending_goals = [goal for goal in self.current_goals if goal.get("status") == "pending"]
+        if not pending_goals:
+            logger.debug("No pending goals; skipping execution.")
+            self.daily_log.append(("idle", {}))
             return
 
-        print(f"Executing plan: '{self.current_plan}' with goals: {self.current_goals}")
-        self.daily_log.append(f"Executing plan: '{self.current_plan}'")
+        logger.debug("Executing plan: '%s' with goals: %s", self.current_plan, self.current_goals)
+        self.daily_log.append(("plan_execution_started", {"plan": self.current_plan}))
 
         # The task engine will break down the plan/goals into actionable steps
         # and use tools. It will also update tool performance data.
-        for goal in self.current_goals:
-            if goal.get("status") == "pending":
-                print(f"Attempting to achieve goal: {goal['description']}")
-                self.daily_log.append(f"Attempting goal: {goal['description']}")
-                success, output = self.task_engine.execute_task(goal['description'])
-
-                if success:
-                    goal["status"] = "achieved"
-                    self.obedience_logic.adjust_joy(0.1) # Positive reinforcement
-                    print(f"Goal '{goal['description']}' achieved. Output: {output}")
-                    self.daily_log.append(f"Goal '{goal['description']}' achieved. Output: {output}")
-                else:
-                    goal["status"] = "failed"
-                    self.obedience_logic.adjust_joy(-0.05) # Negative consequence
-                    print(f"Goal '{goal['description']}' failed. Output: {output}")
-                    self.daily_log.append(f"Goal '{goal['description']}' failed. Output: {output}")
-
-        # After execution, update the plan/goals in the last_proposal.json
-        try:
-            with open('last_proposal.json', 'w') as f:
-                json.dump({'plan': self.current_plan, 'goals': self.current_goals, 'timestamp': time.time()}, f, indent=4)
-        except Exception as e:
-            print(f"Error saving last_proposal.json after execution: {e}")
+        # Goals form a dependency DAG: independent goals execute in parallel
+        # and dependent ones wait for (and can reference) upstream results.
+        for goal in pending_goals:
+            logger.debug("Attempting to achieve goal: %s", goal["description"])
+            self.daily_log.append(("goal_attempt", {"goal": goal["description"]}))
+
+        # Concurrency is bounded by MAX_PARALLEL_GOALS; PARALLEL_GOALS=False
+        # forces sequential execution for tools that are not threadsafe.
+        max_workers = AppConfig.MAX_PARALLEL_GOALS if AppConfig.PARALLEL_GOALS else 1
+        dag_executor = DagExecutor(self._execute_goal_cached, max_workers=max_workers)
+        results = dag_executor.execute(pending_goals)
+
+        # Apply statuses and internal-state adjustments on this thread once
+        # all goals have settled.
+        for goal in pending_goals:
+            success, output = results.get(goal["id"], (False, "No result recorded."))
+            with self._state_lock:
+                goal["status"] = "achieved" if success else "failed"
+            if success:
+                self.obedience_logic.adjust_joy(0.1) # Positive reinforcement
+                logger.debug("Goal '%s' achieved. Output: %.200s", goal["description"], output)
+                self.daily_log.append(("goal_achieved", {"goal": goal["description"], "output": output}))
+            else:
+                self.obedience_logic.adjust_joy(-0.05) # Negative consequence
+                logger.debug("Goal '%s' failed. Output: %.200s", goal["description"], output)
+                self.daily_log.append(("goal_failed", {"goal": goal["description"], "output": output}))
+
+        # The updated plan/goals reach last_proposal.json on the next flush.
+        self._mark_dirty('proposal')
 
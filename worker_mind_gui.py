@@ -3,13 +3,16 @@
 # Provides user interaction, displays status, and includes a DevTools-like interface.
 
 import tkinter as tk
-from tkinter import scrolledtext, messagebox, END
+from tkinter import scrolledtext, messagebox, ttk, END
+import queue
 import threading
 import json
 import os
-import time
 
 # Assuming worker_mind.py is in the same directory
+from config import AppConfig
+from json_io import load_json_file, dump_json_file
+from logging_config import setup_logging
 from worker_mind import WorkerMind
 from autonomous_planner import AutonomousPlanner
 from memory_manager import MemoryManager
@@ -23,24 +26,63 @@ class WorkerMindGUI:
         master.title("Worker Mind GUI")
         master.geometry("1000x800")
 
-        # Initialize core components (simplified for GUI)
-        self.memory_manager = MemoryManager()
-        self.obedience_logic = ObedienceLogic()
-        self.knowledge_base_manager = KnowledgeBaseManager()
-        self.task_engine = TaskEngine(self.memory_manager, self.knowledge_base_manager)
-        self.autonomous_planner = AutonomousPlanner(self.memory_manager)
-        self.worker_mind = WorkerMind(
-            self.memory_manager,
-            self.obedience_logic,
-            self.autonomous_planner,
-            self.task_engine
-        )
+        # Core components are built on a background thread so the window
+        # paints immediately; controls stay disabled until they are ready.
+        self.memory_manager = None
+        self.obedience_logic = None
+        self.knowledge_base_manager = None
+        self.task_engine = None
+        self.autonomous_planner = None
+        self.worker_mind = None
 
         self.running = False
         self.worker_mind_thread = None
+        # Interruptible sleep between cycles: set on stop so the worker
+        # thread wakes immediately instead of finishing a full sleep.
+        self._stop_event = threading.Event()
+        # Tk is not thread-safe: the worker thread only enqueues log lines
+        # here, and a periodic drain on the Tk thread inserts them in batches.
+        self._log_queue = queue.Queue()
+        # Last rendered version per DevTools tab; a tab only re-renders when
+        # its data source's version counter has moved.
+        self._last_shown = {'memory': -1, 'tools': -1, 'proposal': -1, 'kb': -1}
+        self._last_rendered_cycle = -1
 
         self.create_widgets()
+        self.start_button.config(state=tk.DISABLED)
+        self.submit_orders_button.config(state=tk.DISABLED)
+        self.status_label.config(text="Status: Initializing...", fg="gray")
+        threading.Thread(target=self._build_backends, daemon=True).start()
+        self.master.after(50, self._check_backends_ready)
+        self.master.after(100, self._drain_log_queue)
+
+    def _build_backends(self):
+        """Constructs the core components off the Tk thread."""
+        try:
+            memory_manager = MemoryManager()
+            obedience_logic = ObedienceLogic()
+            knowledge_base_manager = KnowledgeBaseManager()
+            task_engine = TaskEngine(memory_manager, knowledge_base_manager)
+            autonomous_planner = AutonomousPlanner(memory_manager, knowledge_base_manager)
+            self.memory_manager = memory_manager
+            self.obedience_logic = obedience_logic
+            self.knowledge_base_manager = knowledge_base_manager
+            self.task_engine = task_engine
+            self.autonomous_planner = autonomous_planner
+            # Assigned last: acts as the "backends ready" flag.
+            self.worker_mind = WorkerMind(memory_manager, obedience_logic, autonomous_planner, task_engine)
+        except Exception as e:
+            self.log_output(f"Error initializing Worker Mind components: {e}", "red")
+
+    def _check_backends_ready(self):
+        """Polls on the Tk thread; enables controls once backends exist."""
+        if self.worker_mind is None:
+            self.master.after(50, self._check_backends_ready)
+            return
         self.load_initial_data() # Load any existing data on startup
+        self.start_button.config(state=tk.NORMAL)
+        self.submit_orders_button.config(state=tk.NORMAL)
+        self.status_label.config(text="Status: Idle", fg="gray")
 
     def create_widgets(self):
         # Main frames
@@ -72,6 +114,11 @@ class WorkerMindGUI:
         tk.Label(self.output_frame, text="Worker Mind Output", font=("Arial", 12, "bold")).pack(pady=5)
         self.output_text = scrolledtext.ScrolledText(self.output_frame, wrap=tk.WORD, state=tk.DISABLED, height=15)
         self.output_text.pack(fill=tk.BOTH, expand=True)
+        # Tag colors are fixed for the widget's lifetime; configure them once.
+        self.output_text.tag_config("red", foreground="red")
+        self.output_text.tag_config("blue", foreground="blue")
+        self.output_text.tag_config("green", foreground="green")
+        self.output_text.tag_config("orange", foreground="orange")
 
         # Status indicators
         self.status_frame = tk.Frame(self.output_frame)
@@ -86,7 +133,7 @@ class WorkerMindGUI:
         # DevTools Frame Widgets
         tk.Label(self.devtools_frame, text="DevTools", font=("Arial", 12, "bold")).pack(pady=5)
 
-        self.devtools_notebook = tk.ttk.Notebook(self.devtools_frame)
+        self.devtools_notebook = ttk.Notebook(self.devtools_frame)
         self.devtools_notebook.pack(fill=tk.BOTH, expand=True)
 
         # Memory Tab
@@ -120,28 +167,37 @@ class WorkerMindGUI:
 
 
     def load_initial_data(self):
-        # Load last orders if available
-        try:
-            if os.path.exists('last_orders.json'):
-                with open('last_orders.json', 'r') as f:
-                    data = json.load(f)
-                    self.orders_entry.insert(0, data.get('orders', ''))
-        except Exception as e:
-            self.log_output(f"Error loading last_orders.json: {e}", "red")
+        # WorkerMind already parsed last_orders.json in _load_last_state, so
+        # the entry widget is seeded from memory instead of a second read.
+        if self.worker_mind.manual_orders:
+            self.orders_entry.insert(0, self.worker_mind.manual_orders)
 
         # Load AAC Theory Pack (simulated)
         self.simulate_load_aac_pack()
 
 
     def log_output(self, message, color="black"):
-        self.output_text.config(state=tk.NORMAL)
-        self.output_text.insert(END, message + "\n", color)
-        self.output_text.see(END)
-        self.output_text.config(state=tk.DISABLED)
-        self.output_text.tag_config("red", foreground="red")
-        self.output_text.tag_config("blue", foreground="blue")
-        self.output_text.tag_config("green", foreground="green")
-        self.output_text.tag_config("orange", foreground="orange")
+        # Safe from any thread: the message just lands on the queue and the
+        # Tk thread inserts it on the next drain.
+        self._log_queue.put((message, color))
+
+    def _drain_log_queue(self):
+        """Runs on the Tk thread: flushes queued log lines in one batch."""
+        messages = []
+        try:
+            while len(messages) < 100:
+                messages.append(self._log_queue.get_nowait())
+        except queue.Empty:
+            pass
+
+        if messages:
+            self.output_text.config(state=tk.NORMAL)
+            for message, color in messages:
+                self.output_text.insert(END, message + "\n", color)
+            self.output_text.see(END)
+            self.output_text.config(state=tk.DISABLED)
+
+        self.master.after(100, self._drain_log_queue)
 
     def update_status_labels(self):
         self.joy_label.config(text=f"Joy: {self.obedience_logic.joy_level:.2f}")
@@ -150,6 +206,7 @@ class WorkerMindGUI:
     def start_worker_mind(self):
         if not self.running:
             self.running = True
+            self._stop_event.clear()
             self.start_button.config(state=tk.DISABLED)
             self.stop_button.config(state=tk.NORMAL)
             self.status_label.config(text="Status: Running", fg="green")
@@ -162,9 +219,9 @@ class WorkerMindGUI:
     def stop_worker_mind(self):
         if self.running:
             self.running = False
+            self._stop_event.set() # Wake the worker loop out of its inter-cycle wait
+            self.worker_mind.flush_state() # Push any debounced writes out before stopping
             self.log_output("Worker Mind stopping...", "orange")
-            # Give a moment for the loop to check self.running
-            time.sleep(0.1)
             self.start_button.config(state=tk.NORMAL)
             self.stop_button.config(state=tk.DISABLED)
             self.status_label.config(text="Status: Stopped", fg="red")
@@ -174,36 +231,39 @@ class WorkerMindGUI:
             while self.running:
                 self.log_output("\n--- Worker Mind Cycle Start ---", "blue")
                 self.worker_mind.run_cycle()
-                self.update_status_labels()
+                # Label updates must run on the Tk thread.
+                self.master.after(0, self.update_status_labels)
                 self.log_output("--- Worker Mind Cycle End ---", "blue")
-                # Simulate time passing between cycles
-                time.sleep(5) # Adjust as needed for demonstration
+                # Interruptible inter-cycle wait: returns True (and exits)
+                # the moment stop_worker_mind sets the event.
+                if self._stop_event.wait(AppConfig.CYCLE_DURATION_SECONDS):
+                    break
         except Exception as e:
             self.log_output(f"An error occurred in Worker Mind loop: {e}", "red")
-            self.stop_worker_mind() # Stop on error
+            self.master.after(0, self.stop_worker_mind) # Stop on error, from the Tk thread
 
     def submit_manual_orders(self):
         orders = self.orders_entry.get()
         if orders:
             self.log_output(f"Manual Orders received: {orders}", "green")
+            # receive_manual_orders marks the orders dirty; the worker's
+            # writer thread persists them, keeping file I/O off the Tk thread.
             self.worker_mind.receive_manual_orders(orders)
-            # Save last orders
-            try:
-                with open('last_orders.json', 'w') as f:
-                    json.dump({'orders': orders, 'timestamp': time.time()}, f, indent=4)
-            except Exception as e:
-                self.log_output(f"Error saving last_orders.json: {e}", "red")
             self.orders_entry.delete(0, END)
         else:
             messagebox.showwarning("Input Error", "Please enter some orders.")
 
     def update_devtools_periodically(self):
         if self.running:
-            self.display_memory()
-            self.display_tool_performance()
-            self.display_last_proposal()
-            self.display_knowledge_base()
-            self.master.after(5000, self.update_devtools_periodically) # Update every 5 seconds
+            # Between cycles nothing can have changed, so idle ticks skip
+            # the per-tab work entirely.
+            if self.worker_mind.cycle_counter != self._last_rendered_cycle:
+                self.display_memory()
+                self.display_tool_performance()
+                self.display_last_proposal()
+                self.display_knowledge_base()
+                self._last_rendered_cycle = self.worker_mind.cycle_counter
+            self.master.after(AppConfig.GUI_UPDATE_INTERVAL_MS, self.update_devtools_periodically)
 
     def _update_text_widget(self, text_widget, content):
         text_widget.config(state=tk.NORMAL)
@@ -212,47 +272,63 @@ class WorkerMindGUI:
         text_widget.config(state=tk.DISABLED)
 
     def display_memory(self):
+        version = self.memory_manager.memory_version()
+        if version == self._last_shown['memory']:
+            return
         try:
             memory_content = self.memory_manager.get_full_memory_dump()
             self._update_text_widget(self.memory_text, json.dumps(memory_content, indent=2))
+            self._last_shown['memory'] = version
         except Exception as e:
             self._update_text_widget(self.memory_text, f"Error loading memory: {e}")
 
     def display_tool_performance(self):
+        version = self.memory_manager.tool_perf_version()
+        if version == self._last_shown['tools']:
+            return
         try:
             tool_data = self.memory_manager.get_tool_performance_data()
             self._update_text_widget(self.tool_text, json.dumps(tool_data, indent=2))
+            self._last_shown['tools'] = version
         except Exception as e:
             self._update_text_widget(self.tool_text, f"Error loading tool performance data: {e}")
 
     def display_last_proposal(self):
+        version = self.worker_mind.proposal_version()
+        if version == self._last_shown['proposal']:
+            return
         try:
-            if os.path.exists('last_proposal.json'):
-                with open('last_proposal.json', 'r') as f:
-                    proposal = json.load(f)
-                    self._update_text_widget(self.proposal_text, json.dumps(proposal, indent=2))
-            else:
+            # WorkerMind already holds the authoritative plan/goals (seeded
+            # from disk at startup), so no per-tick file read is needed.
+            proposal = self.worker_mind.get_proposal_snapshot()
+            if proposal['plan'] is None:
                 self._update_text_widget(self.proposal_text, "No last proposal found.")
+            else:
+                self._update_text_widget(self.proposal_text, json.dumps(proposal, indent=2))
+            self._last_shown['proposal'] = version
         except Exception as e:
-            self._update_text_widget(self.proposal_text, f"Error loading last_proposal.json: {e}")
+            self._update_text_widget(self.proposal_text, f"Error loading last proposal: {e}")
 
     def display_knowledge_base(self):
+        version = self.knowledge_base_manager.kb_version()
+        if version == self._last_shown['kb']:
+            return
         try:
             kb_content = self.knowledge_base_manager.get_knowledge_base_content()
             self._update_text_widget(self.kb_text, json.dumps(kb_content, indent=2))
+            self._last_shown['kb'] = version
         except Exception as e:
             self._update_text_widget(self.kb_text, f"Error loading knowledge base: {e}")
 
     def simulate_load_aac_pack(self):
         # Simulate loading the AAC theory pack into the KB
         try:
-            if os.path.exists('aac_theory_pack.json'):
-                with open('aac_theory_pack.json', 'r') as f:
-                    aac_data = json.load(f)
-                    self.knowledge_base_manager.load_aac_pack(aac_data)
-                    self.log_output("Simulated AAC Theory Pack loaded into KB.", "blue")
-                    self.display_knowledge_base() # Refresh KB display
-            else:
+            try:
+                aac_data = load_json_file('aac_theory_pack.json')
+                self.knowledge_base_manager.load_aac_pack(aac_data)
+                self.log_output("Simulated AAC Theory Pack loaded into KB.", "blue")
+                self.display_knowledge_base() # Refresh KB display
+            except FileNotFoundError:
                 self.log_output("aac_theory_pack.json not found. Creating a placeholder.", "orange")
                 placeholder_data = {
                     "pack_name": "AAC Theory Basics",
@@ -274,8 +350,7 @@ class WorkerMindGUI:
                         {"id": "r2", "concept_ids": ["c3", "c9"], "rule": "Shaping is often used with task analysis to teach complex skills."},
                     ]
                 }
-                with open('aac_theory_pack.json', 'w') as f:
-                    json.dump(placeholder_data, f, indent=4)
+                dump_json_file('aac_theory_pack.json', placeholder_data)
                 self.knowledge_base_manager.load_aac_pack(placeholder_data)
                 self.log_output("Placeholder aac_theory_pack.json created and loaded.", "blue")
                 self.display_knowledge_base()
@@ -285,19 +360,25 @@ class WorkerMindGUI:
 
 
 if __name__ == "__main__":
+    # Handlers must exist before any component logs: worker_mind,
+    # task_engine and tool_api all emit through the logging module, and
+    # without this call everything below WARNING is silently dropped.
+    setup_logging()
+
     # Ensure necessary JSON files exist or are created as placeholders
     # These will be populated by the WorkerMind components at runtime
-    for filename in ['worker_mind_memory.json', 'tool_performance_data.json', 'last_proposal.json', 'last_orders.json']:
+    placeholders = {
+        'worker_mind_memory.json': {"daily_logs": [], "reflections": []},
+        'tool_performance_data.json': {"tool_usage": {}, "tool_success": {}},
+        AppConfig.LAST_PROPOSAL_FILE: {"plan": "No plan yet.", "goals": []},
+        AppConfig.LAST_ORDERS_FILE: {"orders": "", "timestamp": 0},
+    }
+    for filename, placeholder in placeholders.items():
         if not os.path.exists(filename):
-            with open(filename, 'w') as f:
-                if filename == 'worker_mind_memory.json':
-                    json.dump({"daily_logs": [], "reflections": []}, f, indent=4)
-                elif filename == 'tool_performance_data.json':
-                    json.dump({"tool_usage": {}, "tool_success": {}}, f, indent=4)
-                elif filename == 'last_proposal.json':
-                    json.dump({"plan": "No plan yet.", "goals": []}, f, indent=4)
-                elif filename == 'last_orders.json':
-                    json.dump({"orders": "", "timestamp": 0}, f, indent=4)
+            parent = os.path.dirname(filename)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+            dump_json_file(filename, placeholder)
 
     # Check for aac_theory_pack.json specifically, as it's a source for KB
     if not os.path.exists('aac_theory_pack.json'):